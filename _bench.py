@@ -0,0 +1,321 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import itertools as it, functools as ft
+from os.path import join, dirname, realpath
+from tempfile import mkdtemp
+import os, sys, time, random, json, shutil, sqlite3, logging, subprocess
+
+sys.path.insert(0, dirname(realpath(__file__)))
+import ffhomegen
+
+
+words = ( 'alpha beta gamma delta epsilon zeta theta kappa lambda sigma omega'
+	' python linux sqlite firefox music video news blog docs wiki reference'
+	' math crypto network storage kernel shell games art photo travel food' ).split()
+
+def rand_title(rng, n_min=1, n_max=6):
+	return ' '.join(rng.choice(words) for n in xrange(rng.randint(n_min, n_max)))
+
+def rand_url(rng, n):
+	return 'http://{}{}.example.com/{}/{}'.format( rng.choice(words), n % 997,
+		'/'.join(rng.sample(words, rng.randint(0, 3))), n )
+
+
+def places_create(path, bookmarks, tags, favicons, tags_per_bm=3, legacy=False, visits=0, rng=random):
+	'''Creates places.sqlite (and favicons.sqlite, unless legacy=True) in a path dir,
+		with specified number of tagged bookmarks, tags, distinct favicons and history visits.'''
+	db_path, db_icons_path = join(path, 'places.sqlite'), join(path, 'favicons.sqlite')
+	for p in db_path, db_icons_path:
+		if os.path.exists(p): os.unlink(p)
+	tag_names = list('{}-{}'.format(rng.choice(words), n) for n in xrange(tags))
+	icons = list(b'\x89PNG\r\n\x1a\n' + os.urandom(rng.randint(200, 2000)) for n in xrange(favicons))
+
+	with sqlite3.connect(db_path) as db:
+		db.executescript('''
+			create table moz_places (
+				id integer primary key, url longvarchar, title longvarchar, rev_host longvarchar,
+				visit_count integer default 0, hidden integer default 0 not null,
+				typed integer default 0 not null, {}frecency integer default -1 not null,
+				last_visit_date integer, guid text, foreign_count integer default 0 not null,
+				url_hash integer default 0 not null );
+			create table moz_bookmarks (
+				id integer primary key, type integer, fk integer default null, parent integer,
+				position integer, title longvarchar, keyword_id integer, folder_type text,
+				dateAdded integer, lastModified integer, guid text );
+			create table moz_historyvisits (
+				id integer primary key, from_visit integer, place_id integer,
+				visit_date integer, visit_type integer, session integer );
+			create index moz_historyvisits_placedateindex on moz_historyvisits (place_id, visit_date);
+			create index moz_historyvisits_dateindex on moz_historyvisits (visit_date);
+			create index moz_bookmarks_itemindex on moz_bookmarks (fk, type);
+			create index moz_bookmarks_parentindex on moz_bookmarks (parent, position);
+			'''.format('favicon_id integer, ' if legacy else ''))
+		if legacy:
+			db.execute( 'create table moz_favicons (id integer primary key,'
+				' url longvarchar unique, data blob, mime_type varchar(32), expiration long, guid text)' )
+			db.executemany( 'insert into moz_favicons (id, url, data, mime_type) values (?, ?, ?, ?)',
+				((n + 1, 'http://icon{}/favicon.ico'.format(n), sqlite3.Binary(data), 'image/png')
+					for n, data in enumerate(icons)) )
+
+		ts = int(time.time() * 1e6)
+		db.executemany( 'insert into moz_bookmarks'
+			' (id, type, parent, position, title, dateAdded, lastModified) values (?, 2, ?, 0, ?, ?, ?)',
+			[(1, 0, '', ts, ts), (2, 1, 'Bookmarks Menu', ts, ts), (4, 1, 'Tags', ts, ts)] )
+		bm_id = it.count(10)
+		tag_ids = dict((name, next(bm_id)) for name in tag_names)
+		db.executemany( 'insert into moz_bookmarks (id, type, parent, position, title,'
+			' dateAdded, lastModified) values (?, 2, 4, 0, ?, ?, ?)',
+			((tag_ids[name], name, ts, ts) for name in tag_names) )
+
+		def place_rows():
+			for n in xrange(bookmarks):
+				row = [ n + 1, rand_url(rng, n), rand_title(rng), None,
+					rng.randint(0, 100), rng.randint(0, 10000), ts - rng.randint(0, 10**13), n ]
+				if legacy: row[3] = rng.randint(1, favicons) if favicons and rng.random() > 0.1 else None
+				yield row
+		db.executemany( 'insert into moz_places (id, url, title, favicon_id, visit_count,'
+			' frecency, last_visit_date, url_hash) values (?, ?, ?, ?, ?, ?, ?, ?)'
+			if legacy else 'insert into moz_places (id, url, title, visit_count,'
+				' frecency, last_visit_date, url_hash) values (?, ?, ?, ?, ?, ?, ?)',
+			(row if legacy else row[:3] + row[4:] for row in place_rows()) )
+
+		def bookmark_rows():
+			for n in xrange(bookmarks):
+				added = ts - rng.randint(0, 10**13)
+				yield next(bm_id), 1, n + 1, 2, n, rand_title(rng), added, added
+				for name in rng.sample(tag_names, min(tags, rng.randint(0, tags_per_bm * 2))):
+					yield next(bm_id), 1, n + 1, tag_ids[name], 0, None, added, added
+		db.executemany( 'insert into moz_bookmarks (id, type, fk, parent,'
+			' position, title, dateAdded, lastModified) values (?, ?, ?, ?, ?, ?, ?, ?)', bookmark_rows() )
+
+		if visits:
+			db.executemany( 'insert into moz_historyvisits'
+				' (place_id, visit_date, visit_type) values (?, ?, 1)',
+				((rng.randint(1, bookmarks), ts - rng.randint(0, 10**13)) for n in xrange(visits)) )
+
+	if not legacy:
+		with sqlite3.connect(db_icons_path) as db:
+			db.executescript('''
+				create table moz_icons (
+					id integer primary key, icon_url text not null, fixed_icon_url_hash integer not null,
+					width integer not null default 0, root integer not null default 0,
+					color integer, expire_ms integer not null default 0, data blob );
+				create table moz_pages_w_icons (
+					id integer primary key, page_url text not null, page_url_hash integer not null );
+				create table moz_icons_to_pages (
+					page_id integer not null, icon_id integer not null,
+					expire_ms integer not null default 0, primary key (page_id, icon_id) ) without rowid;
+				create index moz_pages_w_icons_urlhashindex on moz_pages_w_icons (page_url_hash);''')
+			db.executemany( 'insert into moz_icons (id, icon_url, fixed_icon_url_hash, width, data)'
+				' values (?, ?, 0, 16, ?)', ( (n + 1, 'http://icon{}/favicon.ico'.format(n),
+					sqlite3.Binary(data)) for n, data in enumerate(icons) ) )
+			if favicons:
+				db.executemany( 'insert into moz_pages_w_icons values (?, ?, ?)',
+					((n + 1, url, n) for n, url in sqlite3.connect(db_path).execute(
+						'select id - 1, url from moz_places')) )
+				db.executemany( 'insert into moz_icons_to_pages (page_id, icon_id) values (?, ?)',
+					((n + 1, rng.randint(1, favicons)) for n in xrange(bookmarks) if rng.random() > 0.1) )
+
+	return db_path
+
+
+def links_create(path, count, rng=random):
+	'Creates hand-written-style links file, with groups, yaml-like and multi-line keys.'
+	with open(path, 'wb') as dst:
+		for n in xrange(count):
+			if n % 50 == 0: dst.write('{} {}:\n'.format(rand_title(rng, 1, 3), n).capitalize())
+			kind, url = n % 5, rand_url(rng, n)
+			if n % 7 == 0: url += '?{}'.format('&'.join('q{}=x'.format(m) for m in xrange(20)))
+			if kind == 0: dst.write('  {}\n'.format(url))
+			elif kind == 1: dst.write('  {}: {}\n'.format(rand_title(rng), url))
+			elif kind == 2: dst.write('  {} - {} {}\n'.format(rand_title(rng), url, rand_url(rng, n + 1)))
+			elif kind == 3:
+				dst.write('  ? {}\n    {}\n  : {}\n'.format(rand_title(rng), rand_title(rng), url))
+			else: dst.write('  {} {}\n'.format(url, rand_title(rng)))
+
+def backlog_create(path, count, depth=3, rng=random):
+	'Creates backlog yaml with nested dicts/lists of links, titled links and tuples.'
+	n, lines = it.count(), list()
+	def layer(indent, level):
+		while True:
+			link_n = next(n)
+			if link_n >= count: return
+			if level < depth and rng.random() < 0.05:
+				lines.append('{}- {}:'.format(indent, rand_title(rng, 1, 2)))
+				layer(indent + '    ', level + 1)
+				continue
+			kind, url = link_n % 3, rand_url(rng, link_n)
+			if kind == 0: lines.append('{}- {}'.format(indent, url))
+			elif kind == 1: lines.append('{}- [{}, {}]'.format(indent, rand_title(rng), url))
+			else: lines.append('{}- {{{}: {}}}'.format(indent, rand_title(rng), url))
+			if level > 0 and rng.random() < 0.1: return
+	layer('', 0)
+	with open(path, 'wb') as dst: dst.write('\n'.join(lines) + '\n')
+
+
+def bench(name, func, repeat, results, baseline=None):
+	ts_list = list()
+	for n in xrange(repeat):
+		ts = time.time()
+		func()
+		ts_list.append(time.time() - ts)
+	ts_list.sort()
+	res = results[name] = dict(min=ts_list[0], median=ts_list[len(ts_list) // 2])
+	line = '{:<30s} {:>10.4f} {:>10.4f}'.format(name, res['min'], res['median'])
+	if baseline and name in baseline:
+		line += ' {:>9.2f}x'.format(res['min'] / max(baseline[name]['min'], 1e-9))
+	print(line)
+	sys.stdout.flush()
+
+
+def main(args=None):
+	import argparse
+	parser = argparse.ArgumentParser(
+		description='Benchmark ffhomegen.py stages and end-to-end runs on synthetic data.')
+	parser.add_argument('-n', '--bookmarks', type=int, metavar='n', default=5000,
+		help='Number of bookmarks to generate (default: %(default)s).')
+	parser.add_argument('-t', '--tags', type=int, metavar='n', default=300,
+		help='Number of distinct tags (default: %(default)s).')
+	parser.add_argument('-T', '--tags-per-bookmark', type=int, metavar='n', default=3,
+		help='Average number of tags per bookmark (default: %(default)s).')
+	parser.add_argument('-i', '--favicons', type=int, metavar='n', default=200,
+		help='Number of distinct favicons (default: %(default)s).')
+	parser.add_argument('--history', type=int, metavar='n', default=0,
+		help='Number of history visits to generate (default: %(default)s).')
+	parser.add_argument('--legacy-schema', action='store_true',
+		help='Generate pre-ff55 places.sqlite with moz_favicons, instead of favicons.sqlite.')
+	parser.add_argument('-l', '--links', type=int, metavar='n', default=5000,
+		help='Number of links in links file (default: %(default)s).')
+	parser.add_argument('-b', '--backlog', type=int, metavar='n', default=20000,
+		help='Number of links in backlog yaml (default: %(default)s).')
+	parser.add_argument('--backlog-depth', type=int, metavar='n', default=3,
+		help='Max nesting depth in backlog yaml (default: %(default)s).')
+	parser.add_argument('-x', '--backlog-pick', metavar='spec', default='random-30',
+		help='Backlog pick spec (default: %(default)s).')
+	parser.add_argument('-f', '--output-format', action='append', metavar='format',
+		help='Output format(s) to benchmark end-to-end runs for (default: fat, dir).')
+	parser.add_argument('-r', '--repeat', type=int, metavar='n', default=3,
+		help='Times to repeat each measurement, min/median are reported (default: %(default)s).')
+	parser.add_argument('-s', '--seed', type=int, metavar='n', default=0,
+		help='Random seed for data generation (default: %(default)s).')
+	parser.add_argument('-w', '--work-dir', metavar='dir',
+		help='Directory to generate data/output in (default: new temp dir, removed afterwards).')
+	parser.add_argument('-o', '--results', metavar='path',
+		help='Write json with parameters and results there, e.g. to compare between commits.')
+	parser.add_argument('-c', '--compare', metavar='path',
+		help='Results json from a previous run (see --results) to print'
+			' min-time ratios against. Warns if parameters used there were different.')
+	parser.add_argument('-d', '--debug', action='store_true', help='Verbose operation mode.')
+	opts = parser.parse_args(sys.argv[1:] if args is None else args)
+
+	logging.basicConfig(level=logging.DEBUG if opts.debug else logging.ERROR)
+	ffhomegen.log = logging.getLogger()
+	rng = random.Random(opts.seed)
+
+	work_dir = opts.work_dir or mkdtemp(prefix='ffhomegen-bench.')
+	try:
+		prof_dir, out_dir = join(work_dir, 'profile'), join(work_dir, 'out')
+		for p in prof_dir, out_dir:
+			if not os.path.isdir(p): os.makedirs(p)
+		paths = dict( (k, join(work_dir, name)) for k, name in
+			dict(links='links.txt', backlog='backlog.yaml', notes='notes.txt').viewitems() )
+
+		ts = time.time()
+		db_path = places_create( prof_dir, opts.bookmarks, opts.tags, opts.favicons,
+			opts.tags_per_bookmark, opts.legacy_schema, opts.history, rng=rng )
+		links_create(paths['links'], opts.links, rng=rng)
+		backlog_create(paths['backlog'], opts.backlog, opts.backlog_depth, rng=rng)
+		with open(paths['notes'], 'wb') as dst:
+			dst.write('\n'.join(rand_title(rng, 3, 10) for n in xrange(100)) + '\n')
+		print('Generated synthetic data in {:.1f}s: {}'.format(time.time() - ts, work_dir))
+
+		params = dict( (k, getattr(opts, k)) for k in
+			[ 'bookmarks', 'tags', 'tags_per_bookmark', 'favicons', 'history', 'legacy_schema',
+				'links', 'backlog', 'backlog_depth', 'backlog_pick', 'repeat', 'seed' ] )
+		baseline = None
+		if opts.compare:
+			with open(opts.compare) as src: baseline = json.load(src)
+			if baseline['params'] != params:
+				print( 'WARNING: parameters differ from ones'
+					' in compared results: {}'.format(baseline['params']), file=sys.stderr )
+			baseline = baseline['results']
+
+		results = dict()
+		print('{:<30s} {:>10s} {:>10s}{}'.format(
+			'stage', 'min', 'median', ' {:>10s}'.format('vs base') if baseline else '' ))
+		run = lambda name, func: bench(name, func, opts.repeat, results, baseline)
+
+		data = dict()
+		def load(name, func, *args):
+			def load_func(): data[name] = func(*args)
+			run(name, load_func)
+		load('bookmarks_get', ffhomegen.bookmarks_get, db_path)
+		load( 'bookmarks_get+favicons', lambda: (lambda favicons: (ffhomegen.bookmarks_get(
+			db_path, favicons=favicons), favicons))(ffhomegen.FaviconStore()) )
+		ffhomegen.bookmarks_load(db_path, favicons=True, cache_dir=join(work_dir, 'cache')) # full sync
+		load( 'bookmarks_load (cached)', ffhomegen.bookmarks_load,
+			db_path, 30, False, True, join(work_dir, 'cache') )
+		load('places_get', ffhomegen.places_get, db_path, 30, False, 30, 0)
+		load('places_get (window)', ffhomegen.places_get, db_path, 30, False, 30, 30)
+		load('links_get', ffhomegen.links_get, paths['links'])
+		load('backlog_get', lambda: set(ffhomegen.backlog_get(paths['backlog'])))
+		load('backlog_process', lambda: ffhomegen.backlog_process(
+			ffhomegen.backlog_get(paths['backlog']), opts.backlog_pick ))
+		ffhomegen.backlog_get(paths['backlog'], join(work_dir, 'cache')).close() # build index
+		load('backlog_process (index)', lambda: ffhomegen.backlog_process(
+			ffhomegen.backlog_get(paths['backlog'], join(work_dir, 'cache')), opts.backlog_pick ))
+		load('notes_get', ffhomegen.notes_get, paths['notes'])
+
+		bookmarks, favicons = data['bookmarks_get+favicons']
+		json_dumps = dict(
+			tags=ft.partial(ffhomegen.dump_tags, bookmarks),
+			backlog=ft.partial(ffhomegen.dump_backlog, data['backlog_process']),
+			links=ft.partial(ffhomegen.dump_links, data['links_get']),
+			places=ft.partial(ffhomegen.dump_places, data['places_get']),
+			notes=ft.partial(ffhomegen.dump_notes, data['notes_get']),
+			favicons=ft.partial(ffhomegen.dump_favicons, favicons) )
+		dump_path = join(out_dir, 'dump.json')
+		def dump(func):
+			with open(dump_path, 'wb') as dst: func(dst)
+		for k, func in sorted(json_dumps.viewitems()):
+			run('dump_{}'.format(k), ft.partial(dump, func))
+		run('dump_tags (all edges)', ft.partial( dump, ft.partial(
+			ffhomegen.dump_tags, bookmarks, edges_prune=dict(top=0, max_edges=0) ) ))
+		run('dump_tags (layout)', ft.partial( dump,
+			ft.partial(ffhomegen.dump_tags, bookmarks, layout_sizes=[(1000, 604)]) ))
+		run('dump_favicons (files)', ft.partial( dump,
+			ft.partial(ffhomegen.dump_favicons, favicons, files_path=join(out_dir, 'dir')) ))
+		parts_path = join(dirname(realpath(ffhomegen.__file__)), 'parts')
+		run('copy_parts', ft.partial(ffhomegen.copy_parts, parts_path, join(out_dir, 'dir')))
+		run('asset_build (minify d3.js)', ft.partial(ffhomegen.asset_build, join(parts_path, 'js', 'd3.js')))
+		run('parts_build', ft.partial(ffhomegen.parts_build, parts_path))
+		run('dump_fat_html', ft.partial(dump, ft.partial(
+			ffhomegen.dump_fat_html, parts_path, json_dumps=json_dumps )))
+		run('dump_fat_html (cached)', ft.partial(dump, ft.partial(
+			ffhomegen.dump_fat_html, parts_path, json_dumps=json_dumps, cache_dir=join(work_dir, 'cache') )))
+
+		for fmt in opts.output_format or ['fat', 'dir']:
+			output_path = join(out_dir, 'e2e-{}'.format(fmt))
+			if fmt in ['fat', 'lean']: output_path += '.html'
+			run('main -f {}'.format(fmt), ft.partial( ffhomegen.main, [
+				'-P', prof_dir, '-f', fmt, '-o', output_path, '-i', '-c', join(work_dir, 'cache'),
+				'-l', paths['links'], '-b', paths['backlog'], '-x', opts.backlog_pick,
+				'-n', paths['notes'], '-r', '30' ] + (['--debug'] if opts.debug else []) ))
+
+		if opts.results:
+			try:
+				commit = subprocess.check_output(
+					['git', 'rev-parse', 'HEAD'], cwd=dirname(realpath(__file__)) ).strip()
+			except (OSError, subprocess.CalledProcessError): commit = None
+			with open(opts.results, 'wb') as dst:
+				json.dump( dict(commit=commit, params=params, results=results),
+					dst, indent=2, sort_keys=True, separators=(',', ': ') )
+				dst.write('\n')
+
+	finally:
+		if not opts.work_dir: shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__': sys.exit(main())
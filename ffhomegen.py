@@ -3,13 +3,14 @@
 from __future__ import print_function
 
 import itertools as it, operator as op, functools as ft
-from os.path import ( join, exists, isfile, isdir,
-	expanduser, dirname, basename, realpath, abspath )
+from os.path import ( join, exists, lexists, isfile, isdir,
+	expanduser, dirname, basename, realpath, abspath, splitext )
 from contextlib import contextmanager, closing
 from collections import defaultdict, OrderedDict, namedtuple
-from tempfile import NamedTemporaryFile
-import os, sys, io, types, re, random, json, shutil
-import sqlite3, ConfigParser, mimetypes
+from tempfile import NamedTemporaryFile, mkdtemp
+import os, sys, io, types, re, time, math, random, json, shutil, hashlib, multiprocessing
+import sqlite3, ConfigParser, mimetypes, resource, struct, mmap, urllib, gzip, cPickle as pickle
+import threading, BaseHTTPServer, SocketServer
 
 
 def force_bytes(bytes_or_unicode, encoding='utf-8', errors='backslashreplace'):
@@ -23,6 +24,48 @@ def force_unicode(bytes_or_unicode, encoding='utf-8', errors='replace'):
 
 class AdHocException(Exception): pass
 
+class Stats(object):
+	'''Wall/cpu time, counters and resource usage for named stages of the run.
+		Stages can be nested, and counters passed to "add" method
+			are summed-up in the innermost one that is currently active.'''
+
+	cpu_time = staticmethod(lambda: sum(resource.getrusage(resource.RUSAGE_SELF)[:2]))
+
+	def __init__(self):
+		self.stages, self.active = OrderedDict(), list()
+		self.ts, self.cpu = time.time(), self.cpu_time()
+
+	@contextmanager
+	def stage(self, name):
+		info = self.stages.setdefault(name, OrderedDict())
+		ts, cpu = time.time(), self.cpu_time()
+		self.active.append(info)
+		try: yield info
+		finally:
+			self.active.pop()
+			info['wall'] = info.get('wall', 0) + time.time() - ts
+			info['cpu'] = info.get('cpu', 0) + self.cpu_time() - cpu
+
+	def add(self, **counters):
+		if not self.active: return
+		info = self.active[-1]
+		for k, v in counters.viewitems(): info[k] = info.get(k, 0) + v
+
+	def dump(self, dst):
+		ru_self, ru_children = it.imap( resource.getrusage,
+			[resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN] )
+		json.dump(OrderedDict([
+			('wall', time.time() - self.ts), ('cpu', self.cpu_time() - self.cpu),
+			('cpu_children', sum(ru_children[:2])),
+			('peak_rss_kb', ru_self.ru_maxrss), ('peak_rss_children_kb', ru_children.ru_maxrss),
+			('stages', self.stages) ]), dst, indent=2, separators=(',', ': '))
+		dst.write('\n')
+
+stats = Stats() # replaced in main(), collected but never used otherwise
+
+@contextmanager
+def dummy_ctx(value=None): yield value
+
 def get_profile_dir(profile):
 	if profile:
 		if profile.startswith(os.sep): return profile
@@ -59,74 +102,389 @@ def get_profile_dir(profile):
 	assert isdir(profile_path), [name, profile_path]
 	return profile_path
 
+def get_profile_dirs(profiles=None):
+	'''Returns list of (name, path) tuples for specified profile names/keys/paths
+		(same as for get_profile_dir), or for all profiles in profiles.ini, if none are specified.'''
+	if profiles:
+		return list(( basename(profile.rstrip(os.sep))
+			if profile.startswith(os.sep) else profile, get_profile_dir(profile) ) for profile in profiles)
+	ff_home = expanduser('~/.mozilla/firefox')
+	profiles = ConfigParser.RawConfigParser()
+	profiles.read(join(ff_home, 'profiles.ini'))
+	return list( (profiles.get(k, 'Name').strip(), join(ff_home, profiles.get(k, 'Path')))
+		for k in profiles.sections() if k.startswith('Profile') )
+
 
 def sqlite_dict_row(cursor, row):
 	row = sqlite3.Row(cursor, row)
 	return dict((k, row[k]) for k in row.keys())
 
-def bookmarks_get(db_path, timeout=30):
+@contextmanager
+def sqlite_snapshot(db_paths, attempts=5):
+	'''Yields list of paths to temporary copies of sqlite dbs with their journal/wal files.
+		Copy is retried until all source files stay unchanged during it,
+			so that it won't catch db in the middle of a write or checkpoint.'''
+	tmp_dir = mkdtemp(prefix='{}.snapshot.'.format(basename(db_paths[0])))
+	stat_key = lambda p: (lambda s: (s.st_ino, s.st_size, s.st_mtime))(os.stat(p))
+	try:
+		for n in xrange(attempts):
+			src_files = list( p for p in
+				(db_path + ext for db_path in db_paths for ext in ['', '-wal', '-journal'])
+				if exists(p) )
+			try:
+				src_stats = map(stat_key, src_files)
+				for p in src_files: shutil.copyfile(p, join(tmp_dir, basename(p)))
+				if map(stat_key, src_files) == src_stats: break
+			except (OSError, IOError) as err: # e.g. wal removed on checkpoint
+				log.debug('Error while copying db files: %s', err)
+			for p in os.listdir(tmp_dir): os.unlink(join(tmp_dir, p))
+			log.debug('sqlite db was modified during snapshot copy, retrying (attempt: %s)', n + 1)
+			time.sleep(0.1 * (n + 1))
+		else:
+			raise RuntimeError( 'Failed to make consistent snapshot'
+				' of sqlite db(s) in {} attempt(s): {}'.format(attempts, db_paths) )
+		yield list(join(tmp_dir, basename(p)) for p in db_paths)
+	finally: shutil.rmtree(tmp_dir, ignore_errors=True)
+
+@contextmanager
+def sqlite_connect(db_path, timeout=30, snapshot=False, attach=None):
+	'''Connect to either specified sqlite db or to its snapshot copy.
+		Snapshot is never locked by anything else and can be read
+			without waiting on (or blocking) whatever app is using the original db.
+		"attach" can be a {name: path} dict of extra dbs to attach to connection.'''
+	attach = sorted((attach or dict()).viewitems())
+	db_paths = [db_path] + map(op.itemgetter(1), attach)
+	with (sqlite_snapshot(db_paths) if snapshot else dummy_ctx(db_paths)) as db_paths:
+		with closing(sqlite3.connect(db_paths[0], timeout=timeout)) as conn:
+			for (name, _), path in zip(attach, db_paths[1:]):
+				conn.execute('attach database ? as {}'.format(name), (path,))
+			with conn: yield conn
+
+def favicon_mime(data):
+	'Guess favicon mime type by the magic bytes, as modern moz_icons table does not store it.'
+	for magic, mime_type in [
+			('\x89PNG', 'image/png'), ('\0\0\1\0', 'image/x-icon'),
+			('GIF8', 'image/gif'), ('\xff\xd8', 'image/jpeg'),
+			('RIFF', 'image/webp'), ('BM', 'image/bmp') ]:
+		if data.startswith(magic): return mime_type
+	if data.lstrip()[:1] == '<': return 'image/svg+xml'
+	return 'application/octet-stream'
+
+class FaviconStore(dict):
+	'''Content-addressed favicon store with {key: (mime_type, data)} items.
+		Identical icons get same key, so should only be stored/emitted once.'''
+
+	def add(self, data, mime_type=None):
+		data = bytes(data)
+		key = hashlib.sha256(data).hexdigest()[:16]
+		if key not in self: self[key] = mime_type or favicon_mime(data), data
+		return key
+
+	def filename(self, key):
+		return key + (mimetypes.guess_extension(self[key][0]) or '')
+
+	def data_url(self, key):
+		mime_type, data = self[key]
+		return 'data:{};base64,{}'.format(mime_type, data.encode('base64').replace('\n', ''))
+
+class SQLiteQueryLog(list):
+	'List of (query, row_count, seconds) tuples for queries made via "fetch" method.'
+
+	def fetch(self, c, query, params=()):
+		ts = time.time()
+		c.execute(query, params)
+		rows = c.fetchall()
+		self.append((' '.join(query.split()), len(rows), time.time() - ts))
+		stats.add(sqlite_queries=1, sqlite_rows=len(rows), sqlite_time=self[-1][2])
+		return rows
+
+	def log_stats(self, desc):
+		log.debug( '%s: %s sqlite queries, %.3fs',
+			desc, len(self), sum(it.imap(op.itemgetter(2), self)) )
+		for query, rows, td in self:
+			log.debug('  query (%.3fs, %s row(s)): %s', td, rows, query)
+
+class BookmarksState(object):
+	'''Raw moz_bookmarks/moz_places rows and bookmarks built from these,
+			along with high-water marks of row modification/visit timestamps.
+		On each sync, rows that are missing from db get removed, and only ones with
+				lastModified/dateAdded after the mark, or with new ids get fetched, along with places
+				for these and bookmarked places that were visited since the last sync.
+			Only bookmarks for these places get rebuilt, unless some folder/tag got renamed or removed.
+		Changes to places without new visits (e.g. periodic frecency re-calculation)
+			are only picked-up on full re-sync, which is done when state is older than max_age.'''
+
+	version, max_age = 1, 24 * 3600
+
+	def __init__(self, db_path=None):
+		self.db_id, self.ts = db_path and self.db_stat(db_path), time.time()
+		self.ids, self.folders, self.bookmarks, self.tag_links = set(), dict(), dict(), dict()
+		self.fk_bookmarks, self.fk_tag_links = dict(), dict()
+		self.places, self.icons, self.favicons = dict(), dict(), FaviconStore()
+		self.bms, self.mark, self.visit_mark = dict(), None, None
+		self.synced, self.changed = False, True
+
+	@staticmethod
+	def db_stat(db_path):
+		st = os.stat(db_path)
+		return st.st_dev, st.st_ino
+
+	@classmethod
+	def load(cls, path, db_path):
+		'Returns state pickled to path, or new one, if it is missing, outdated or for a different db.'
+		state = cls(db_path)
+		if not exists(path): return state
+		try:
+			with open(path, 'rb') as src: data = pickle.load(src)
+		except Exception as err:
+			log.debug('Failed to load bookmarks state (%s): %s', path, err)
+			return state
+		if data.get('version') != cls.version or data['db_id'] != state.db_id\
+				or not 0 <= time.time() - data['ts'] < cls.max_age:
+			log.debug('Bookmarks state is outdated, doing full sync: %s', path)
+			return state
+		state.__dict__.update(data, favicons=FaviconStore(data['favicons']), changed=False)
+		stats.add(cache_hits=1)
+		return state
+
+	def save(self, path):
+		if not isdir(dirname(path)): os.makedirs(dirname(path))
+		with dump_tempfile(path) as dst:
+			pickle.dump( dict( self.__dict__, version=self.version,
+				favicons=dict(self.favicons) ), dst, pickle.HIGHEST_PROTOCOL )
+		self.changed = False
+
+	def _row_remove(self, bm_id, fks):
+		'Removes moz_bookmarks row, returning True if it was a folder.'
+		self.ids.discard(bm_id)
+		if self.folders.pop(bm_id, False) is not False: return True
+		for rows, fk_index in [ (self.bookmarks, self.fk_bookmarks),
+				(self.tag_links, self.fk_tag_links) ]:
+			if bm_id not in rows: continue
+			fk = rows.pop(bm_id)[0]
+			fk_index[fk].discard(bm_id)
+			if not fk_index[fk]: del fk_index[fk]
+			fks.add(fk)
+		return False
+
+	def _row_add(self, r, fks):
+		'Adds/updates moz_bookmarks row, returning True if some folder got renamed.'
+		bm_id, fk, title = r['id'], r['fk'], r['title']
+		if r['type'] == 2:
+			if bm_id not in self.folders: self._row_remove(bm_id, fks)
+			renamed = self.folders.get(bm_id, title) != title
+			self.folders[bm_id] = title
+			self.ids.add(bm_id)
+			return renamed
+		renamed = self._row_remove(bm_id, fks)
+		self.ids.add(bm_id)
+		if r['type'] != 1: return renamed
+		if title is not None:
+			self.bookmarks[bm_id] = fk, title, r['dateAdded'], r['parent']
+			self.fk_bookmarks.setdefault(fk, set()).add(bm_id)
+		else: # tag link
+			self.tag_links[bm_id] = fk, r['parent']
+			self.fk_tag_links.setdefault(fk, set()).add(bm_id)
+		fks.add(fk)
+		return renamed
+
+	def _bookmark_build(self, fk):
+		if fk not in self.fk_bookmarks: return
+		bm_ids, place = sorted(self.fk_bookmarks[fk]), self.places.get(fk)
+		if place is None:
+			for bm_id in bm_ids:
+				bm = dict(zip(['bm_title', 'bm_added', 'bm_folder'], self.bookmarks[bm_id][1:]))
+				log.warn( 'Missing moz_places entry for bookmark,'
+					' ignoring: %s (fk: %s, %s)', bm_id, fk, bm )
+			return
+		if place['hidden']: return
+		fk, title, added, folder = self.bookmarks[bm_ids[-1]] # last one wins
+		bm = dict(place, bm_title=title, bm_added=added, bm_folder=folder, bm_tags=set())
+		# Tags
+		for t in (self.tag_links[bm_id][1] for bm_id in self.fk_tag_links.get(fk, list())):
+			try: bm['bm_tags'].add(self.folders[t])
+			except KeyError:
+				log.warn( 'Unknown tag id in'
+					' bookmark-tag link, skipping: %s (bm: %s)', t, bm )
+		# Path
+		# XXX: subdir parents, if I'll ever use these
+		try: bm['bm_folder'] = self.folders[folder]
+		except KeyError:
+			log.warn( 'Unknown parent folder id in'
+				' bookmark-parent link, using "Unknown": %s (bm: %s)', folder, bm )
+			bm['bm_folder'] = 'Unknown'
+		# Favicon
+		if fk in self.icons: bm['favicon'] = self.icons[fk]
+		return bm
+
+	def sync(self, c, query_log, favicons=False, favicons_db=False):
+		'Updates state from moz_bookmarks/moz_places (and favicons) via db cursor.'
+		full, fks = not self.synced, set()
+
+		def fetch_ids(query, col, ids, chunk=500):
+			'Runs query for all rows (ids=None), or ones with col value in ids, in chunks.'
+			if ids is None: return query_log.fetch(c, query.format('1'))
+			rows, ids = list(), list(ids)
+			for n in xrange(0, len(ids), chunk):
+				ids_chunk = ids[n:n+chunk]
+				rows.extend(query_log.fetch(c, query.format('{} in ({})'.format(
+					col, ', '.join(['?']*len(ids_chunk)) )), ids_chunk))
+			return rows
+
+		# Bookmark, folder and tag rows
+		# Type-1 rows with title are bookmarks, ones without it - tag links.
+		ids = set(r['id'] for r in query_log.fetch(c, 'select id from moz_bookmarks'))
+		renamed, removed = full, self.ids - ids
+		for bm_id in removed: renamed |= self._row_remove(bm_id, fks)
+		rows_query = 'select id, type, fk, parent, title, dateAdded, lastModified from moz_bookmarks where {}'
+		rows = list(query_log.fetch( c, rows_query.format(
+			'max(coalesce(lastModified, 0), coalesce(dateAdded, 0)) > ?' ), [-1 if self.mark is None else self.mark] ))
+		rows_new = ids - self.ids - set(r['id'] for r in rows)
+		if rows_new: rows.extend(fetch_ids(rows_query, 'id', rows_new))
+		for r in rows:
+			renamed |= self._row_add(r, fks)
+			self.mark = max(self.mark, r['lastModified'], r['dateAdded'])
+
+		# Places
+		places_query = '''
+			select * from moz_places where id in
+				(select fk from moz_bookmarks where type = 1 and title is not null) and {}'''
+		places = fetch_ids(places_query, 'id', None if full else fks)
+		if not full and self.visit_mark is not None:
+			places.extend(query_log.fetch( c,
+				places_query.format('last_visit_date > ?'), [self.visit_mark] ))
+		places_synced = set(fks)
+		for r in places:
+			r.pop('favicon_id', None)
+			self.places[r['id']] = r
+			places_synced.add(r['id'])
+			self.visit_mark = max(self.visit_mark, r['last_visit_date'])
+		for fk in places_synced.difference(self.fk_bookmarks):
+			self.places.pop(fk, None)
+			self.icons.pop(fk, None)
+
+		# Favicons
+		# XXX: fetch missing ones maybe?
+		if favicons:
+			tables = set(r['name'] for r in query_log.fetch(c,
+				"select name from sqlite_master where type = 'table'" ))
+			if 'moz_favicons' in tables: # ff < 55
+				icons_ids = '''
+					select id as place_id, favicon_id as icon_id from moz_places
+					where id in (select fk from moz_bookmarks where type = 1 and title is not null)
+						and favicon_id is not null and {}'''
+				icons_data, icons_col = 'select id, data, mime_type from moz_favicons where {}', 'id'
+			elif favicons_db: # ff 55+ favicons.sqlite, attached as "icons"
+				# Picks one icon per page, with width closest to 16px
+				icons_ids = '''
+					select p.id as place_id, (
+						select ip.icon_id from icons.moz_icons_to_pages ip
+						join icons.moz_icons i on i.id = ip.icon_id
+						where ip.page_id = pi.id order by abs(i.width - 16) limit 1 ) as icon_id
+					from moz_places p
+					join icons.moz_pages_w_icons pi on pi.page_url_hash = p.url_hash and pi.page_url = p.url
+					where p.id in (select fk from moz_bookmarks where type = 1 and title is not null) and {}'''
+				icons_data = 'select id, data, null as mime_type from icons.moz_icons where {}'
+				icons_col = 'p.id'
+			else: icons_ids = None
+			if icons_ids:
+				icons_ids = fetch_ids(icons_ids, icons_col, None if full else places_synced)
+				# Only distinct icon blobs are fetched and hashed
+				icons = dict(
+					(r['id'], self.favicons.add(r['data'], r['mime_type']))
+					for r in fetch_ids(icons_data, 'id', set(r['icon_id'] for r in icons_ids)) if r['data'] )
+				for fk in places_synced: self.icons.pop(fk, None)
+				for r in icons_ids:
+					if r['icon_id'] in icons: self.icons[r['place_id']] = icons[r['icon_id']]
+				icons = set(self.icons.viewvalues())
+				for key in set(self.favicons).difference(icons): del self.favicons[key]
+			else: log.debug('No known favicons db layout found, skipping favicons')
+
+		# Rebuild bookmarks for changed places
+		if renamed: places_synced = set(self.fk_bookmarks).union(self.bms)
+		for fk in places_synced:
+			bm = self._bookmark_build(fk)
+			if bm: self.bms[fk] = bm
+			else: self.bms.pop(fk, None)
+		if rows or removed or places_synced: self.changed = True
+		self.synced = True
+		stats.add(bookmarks_synced=len(places_synced))
+
+def bookmarks_get( db_path, timeout=30,
+		snapshot=False, favicons=None, query_log=None, state=None ):
+	'''Returns {place_id: bookmark_info} dict for all tagged/untagged bookmarks.
+		Favicons are only fetched if FaviconStore is passed as "favicons",
+			with bookmarks referencing these by the "favicon" key.
+		BookmarksState from previous run can be passed to only query changes since then,
+			otherwise all bookmarks are fetched with a small fixed number of queries.'''
 	assert isfile(db_path), db_path
-	bms = defaultdict(lambda: dict(bm_tags=set()))
+	if state is None: state = BookmarksState()
+	if query_log is None: query_log = SQLiteQueryLog()
 
-	with sqlite3.connect(db_path, timeout=timeout) as conn:
+	favicons_db = join(dirname(db_path), 'favicons.sqlite')
+	favicons_db = favicons is not None and isfile(favicons_db) and favicons_db
+	with sqlite_connect( db_path, timeout=timeout, snapshot=snapshot,
+			attach=favicons_db and dict(icons=favicons_db) ) as conn:
 		conn.row_factory = sqlite_dict_row
 		with closing(conn.cursor()) as c:
-			c.execute('select * from moz_bookmarks')
-			bm_data = c.fetchall()
-
-			bms_meta = dict()
-			for r in bm_data:
-				t, fk = r['type'], r['fk']
-				if t == 1 and r['title'] is not None:
-					bm = dict(bm_title=r['title'], bm_added=r['dateAdded'], bm_folder=r['parent'])
-					c.execute('select * from moz_places where id = ?', (fk,))
-					p = c.fetchone()
-					if p is None or p['hidden']:
-						if p is None:
-							log.warn('Missing moz_places entry for bookmark, ignoring: %s', r)
-						bms[fk]['legit'] = False
-						continue
-					assert not set(bm).intersection(p), [bm, p]
-					bm.update(p)
-					bms[fk].update(bm)
-					bms[fk].setdefault('legit', True)
-				elif t == 1: bms[fk]['bm_tags'].add(r['parent']) # tag link
-				elif t == 2: bms_meta[r['id']] = r['title']
-				else: raise ValueError(r)
-
-			for fk in bms.keys():
-				if not bms[fk].pop('legit', False):
-					del bms[fk]
-					continue
-				bm = bms[fk]
-				# Tags
-				bm_tags, tags = bm['bm_tags'], set()
-				for t in bm_tags:
-					try: tags.add(bms_meta[t])
-					except KeyError:
-						log.warn( 'Unknown tag id in'
-							' bookmark-tag link, skipping: %s (bm: %s)', t, bm )
-				bm_tags.clear()
-				bm_tags.update(tags)
-				# Path
-				# XXX: subdir parents, if I'll ever use these
-				try: bm['bm_folder'] = bms_meta[bm['bm_folder']]
-				except KeyError:
-					log.warn( 'Unknown parent folder id in'
-						' bookmark-parent link, using "Unknown": %s (bm: %s)', bm['bm_folder'], bm )
-					bm['bm_folder'] = 'Unknown'
-				# Favicon
-				# XXX: fetch missing ones maybe?
-				favicon = bm.pop('favicon_id')
-				if favicon:
-					c.execute('select data, mime_type from moz_favicons where id = ?', (favicon,))
-					favicon = c.fetchone()
-				if favicon:
-					bm['favicon'] = dict(
-						mime_type=favicon['mime_type'],
-						data=bytes(favicon['data']).encode('base64') )
-
-	return bms
+			state.sync(c, query_log, favicons=favicons is not None, favicons_db=bool(favicons_db))
+	if favicons is not None:
+		favicons.update((key, state.favicons[key]) for key in set(state.icons.viewvalues()))
+
+	query_log.log_stats('Bookmarks extraction ({})'.format(db_path))
+	return state.bms
+
+def places_get( db_path, timeout=30, snapshot=False,
+		limit=30, days=30, per_host=3, order='visits', query_log=None ):
+	'''Returns list of "limit" top visited pages as {url, title, host, visits, frecency, last_visit} dicts.
+		Visits are counted over last "days" from moz_historyvisits (or all-time ones from moz_places, if 0),
+			with ranking by "order" (visits or frecency), up to "per_host" pages from
+			same host (0 - no limit) and limit all done in sqlite, so only result rows are fetched.'''
+	assert isfile(db_path), db_path
+	assert order in ['visits', 'frecency'], order
+	if query_log is None: query_log = SQLiteQueryLog()
+
+	if days:
+		# "not in" visit types are embed, download, framed link, reload
+		# "+place_id" stops sqlite from scanning whole placedateindex to avoid sorting groups
+		places, params = '''
+			select p.url, p.title, p.rev_host, p.frecency, v.visits, v.last_visit
+			from (
+				select place_id, count(*) as visits, max(visit_date) as last_visit
+				from moz_historyvisits where visit_date >= ? and visit_type not in (0, 4, 7, 8, 9)
+				group by +place_id ) as v
+			join moz_places as p on p.id = v.place_id
+			where not p.hidden and (p.url like 'http://%' or p.url like 'https://%')''',\
+			[int((time.time() - days * 24 * 3600) * 1e6)]
+	else:
+		places, params = '''
+			select url, title, rev_host, frecency, visit_count as visits, last_visit_date as last_visit
+			from moz_places where visit_count > 0
+				and not hidden and (url like 'http://%' or url like 'https://%')''', list()
+	order = '{} desc, last_visit desc'.format(order)
+	if per_host and sqlite3.sqlite_version_info < (3, 25):
+		log.warning( 'sqlite %s does not support window functions (3.25+),'
+			' not limiting top places per host', sqlite3.sqlite_version )
+		per_host = 0
+	if per_host:
+		places = '''
+			select * from (
+				select *, row_number() over (partition by rev_host order by {}) as host_rank
+				from ({}) ) where host_rank <= ?'''.format(order, places)
+		params.append(per_host)
+	places = 'select * from ({}) order by {} limit ?'.format(places, order)
+	params.append(limit)
+
+	with sqlite_connect(db_path, timeout=timeout, snapshot=snapshot) as conn:
+		conn.row_factory = sqlite_dict_row
+		with closing(conn.cursor()) as c: places = query_log.fetch(c, places, params)
+	for p in places:
+		p['host'] = (p.pop('rev_host') or '')[::-1].lstrip('.')
+		p.pop('host_rank', None)
+		if p['last_visit'] is not None: p['last_visit'] //= 10**6 # unix time
+	query_log.log_stats('Top places extraction ({})'.format(db_path))
+	stats.add(places=len(places))
+	return places
 
 
 detect_link = lambda slug:\
@@ -158,39 +516,57 @@ class Link(namedtuple('Link', 'url title')):
 		return super(Link, cls).__new__(cls, url, title)
 
 
-def links_get(path):
-	with open(path) as src:
-		url_re = re.compile(r'^(?P<pre>.*)\b(?P<url>https?://(?P<title>\S+))(?P<post>.*)$')
-		links = list()
-
-		def link_process(match):
-			pre, post, url, title = map( bytes.strip,
-				(match.group(n) for n in ['pre', 'post', 'url', 'title']) )
-			if len(title) > 100:
-				if '?' in title:
-					title_base, title_query = title.split('?', 1)
-					if len(title_query) > 20:
-						title = '{}?{}...'.format(title_base, title_query)
-				if len(title) > 120: title = '{}...'.format(title[:100])
-			return pre, post, url, title
-
-		def link_append(url, title):
-			title, url = map(force_unicode, [' '.join(title.split()), url])
-			links.append(Link(url, title))
-
-		for src_line in iter(src.readline, ''):
-			match = url_re.search(src_line)
-			indent = re.search(r'^\s', src_line)
+def links_get(path, key_ctx_max=3000):
+	'''Parses links file in a single pass over its lines.
+		Lines can be grouped under "some group:" headers and can use yaml-like
+			"title: url" notation, including multiline "? title" keys, which are
+			only tracked for up to key_ctx_max bytes back from the url line.'''
+	url_re = re.compile(r'^(?P<pre>.*)\b(?P<url>https?://(?P<title>\S+))(?P<post>.*)$')
+	links, title_pre, title_pre_n, key_ctx, key_ctx_len = list(), None, 0, None, 0
+
+	def key_unquote(key):
+		if len(key) < 2 or key[0] != key[-1] or key[0] not in '\'"': return key
+		if key[0] == "'": return key[1:-1].replace("''", "'")
+		try: return force_bytes(json.loads(key))
+		except ValueError: return key
+
+	def key_multiline(ctx):
+		# Same as what yaml.safe_load would return for simple "? key" blocks
+		ctx_indent, ctx_lines = ctx[0].split('?', 1)[0], list()
+		for line in ctx:
+			line = line.rstrip('\n')
+			if not line: continue
+			if not line.startswith(ctx_indent): return ''
+			ctx_lines.append(line[len(ctx_indent):].strip())
+		key, value = ctx_lines[0][1:], ctx_lines.pop()
+		if not value[1:2].isspace() or (key and not key[0].isspace()): return ''
+		ctx_lines[0] = key.strip()
+		for n, line in enumerate(ctx_lines):
+			if line.startswith(':'): return ''
+			if re.search(r'(^|\s)#', line):
+				if n != len(ctx_lines) - 1: return ''
+				ctx_lines[n] = re.sub(r'(^|\s)#.*$', '', line)
+		return key_unquote(' '.join(ctx_lines).strip())
 
+	with open(path) as src:
+		for line in src:
+			if line.strip().startswith('?'): key_ctx, key_ctx_len = list(), 0
+			if key_ctx is not None:
+				key_ctx.append(line)
+				key_ctx_len += len(line)
+				if key_ctx_len > key_ctx_max: key_ctx = None
+
+			match = url_re.search(line)
+			indent = line[:1].isspace()
 			if not match:
-				if not indent and src_line.strip().endswith(':'): # yaml/rst-like group
-					title_pre_n, title_pre = 0, src_line.strip().rstrip(':')
+				if not indent and line.strip().endswith(':'): # yaml/rst-like group
+					title_pre_n, title_pre = 0, line.strip().rstrip(':')
 					if len(title_pre) > 50: title_pre = '{}...'.format(title_pre[:30])
 				continue
 			if not indent: title_pre = None
 
-			pre, post, url, title = link_process(match)
-
+			pre, post, url, title = map( bytes.strip,
+				(match.group(n) for n in ['pre', 'post', 'url', 'title']) )
 			if len(title) > 100:
 				if '?' in title:
 					title_base, title_query = title.split('?', 1)
@@ -199,102 +575,233 @@ def links_get(path):
 				if len(title) > 120: title = '{}...'.format(title[:100])
 
 			if pre.endswith(':') and not post: # looks like yaml notation
-				import yaml
-				src_yaml = src_line
-
-				if not pre.rstrip(':'): # split multiline key on top
-					pos = src.tell()
-					try:
-						src.seek(max(0, pos - 300 * 10))
-						ctx_key, ctx = list(), src.read(pos - src.tell()).split('\n')
-						for line in reversed(ctx):
-							if not line: continue
-							ctx_key.append(line)
-							if line.strip().startswith('?'):
-								ctx_indent = line.split('?', 1)[0]
-								break
-						else: ctx_key = None
-						if ctx_key:
-							ctx, ctx_indent_len = list(reversed(ctx_key)), len(ctx_indent)
-							for n, line in enumerate(ctx):
-								if not line.startswith(ctx_indent): break
-								ctx[n] = line[ctx_indent_len:]
-							else: src_yaml = '\n'.join(ctx)
-					finally: src.seek(pos)
-
-				try:
-					data = yaml.safe_load(src_yaml)
-					if not isinstance(data, dict): raise ValueError
-					try: (title, url), = data.items()
-					except ValueError: pass
-					else: title, url = map(force_bytes, [title, url])
-				except: title = pre.rstrip(':')
+				title = pre.rstrip(':')
+				if title: title = key_unquote(title)
+				elif key_ctx: title = key_multiline(key_ctx)
 
 			if title_pre:
 				title = '{}[{}] :: {}'.format(title_pre, title_pre_n, title)
 				title_pre_n += 1
-			link_append(url, title)
-
-			while True: # make sure all links in line are processed
-				match = url_re.search(post)
-				if not match: break
-				pre, post, url, title = link_process(match)
-				link_append(url, title)
+			title, url = map(force_unicode, [' '.join(title.split()), url])
+			links.append(Link(url, title))
 
 	return links
 
-def backlog_get(path):
+def backlog_iter(path):
+	'''Generates Link tuples from backlog yaml, walking its parser events,
+		so that whole structure never has to be loaded into memory.
+		Strings, [title, url] pairs and "title: url" mappings are links, while
+			non-link scalar next to a list/mapping is a name for that group of links.'''
 	import yaml
-	with open(path) as src: backlog = yaml.safe_load(src)
-
-	def process_layer(data, path=None):
-		if path is None: path = list()
-		if isinstance(data, types.StringTypes):
-			path += ['string']
-			# print('STR', repr(data)[:100])
-			try: return Link(data)
-			except LinkMissing:
-				log.warn('Dangling string not bound to any links (path: %s): %r', path, data)
-		elif isinstance(data, (list, tuple)):
-			if len(data) == 2:
-				# print('TUPLE', repr(data)[:100])
-				try: return Link(*data)
-				except LinkError: pass
-				if not isinstance(data[0], (list, dict, tuple))\
-						and isinstance(data[1], (list, dict, tuple))\
-						and not detect_link(data[0]):
-					return process_layer(data[1], path+[data[0]])
-			# print('LIST', repr(data)[:100])
-			return filter(None, list(process_layer(val, path+[n]) for n, val in enumerate(data)))
-		elif isinstance(data, dict):
-			path += ['dict']
-			# print('DICT', repr(data)[:100])
-			return process_layer(data.items(), path)
-		else:
-			log.warn( 'Unrecognized data structure'
-				' (path: %s, type: %s): %s', path, type(data), data )
-
-	def flatten(val):
-		if not isinstance(val, Link):
-			for val in val:
-				for val in flatten(val): yield val
-		else: yield val
-
-	return set(flatten(process_layer(backlog)))
+	Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+	scalar_events = yaml.ScalarEvent, yaml.AliasEvent
+	scalar_types = types.StringTypes, types.NoneType, int
+	anchors, unset = dict(), object()
+
+	def scalar(ev):
+		if isinstance(ev, yaml.AliasEvent):
+			val = anchors.get(ev.anchor, unset)
+			if val is unset: log.warn('Skipping alias to non-scalar yaml node: %s', ev.anchor)
+			return val
+		tag = ev.tag
+		if tag is None or tag == '!':
+			tag = loader.resolve(yaml.ScalarNode, ev.value, ev.implicit)
+		node = yaml.ScalarNode(tag, ev.value, ev.start_mark, ev.end_mark, ev.style)
+		val = loader.yaml_constructors.get(tag, loader.yaml_constructors[None])(loader, node)
+		if ev.anchor: anchors[ev.anchor] = val
+		return val
+
+	def link_scalars(items):
+		for path, val in items:
+			if val is unset: continue
+			if isinstance(val, types.StringTypes):
+				if detect_link(val):
+					yield Link._make((val, None))
+					continue
+				log.warn('Dangling string not bound to any links (path: %s): %r', path, val)
+			else:
+				log.warn( 'Unrecognized data structure'
+					' (path: %s, type: %s): %s', path, type(val), val )
+
+	def link_pair(items):
+		(_, val1), (_, val2) = items
+		link1, link2 = detect_link(val1), detect_link(val2)
+		if link1 == link2 or not all(isinstance(val, scalar_types) for val in [val1, val2]):
+			return link_scalars(items)
+		url, title = (val1, val2) if link1 else (val2, val1)
+		return [Link._make((url, unicode(title) if title else None))]
+
+	def walk(ev, path):
+		if isinstance(ev, scalar_events):
+			for link in link_scalars([(path, scalar(ev))]): yield link
+		elif isinstance(ev, yaml.SequenceStartEvent):
+			for link in walk_seq(path): yield link
+		elif isinstance(ev, yaml.MappingStartEvent):
+			for link in walk_map(path): yield link
+
+	def walk_seq(path):
+		# Scalars in first two positions are only processed on 3rd item or sequence end,
+		#  as these can be either a [title, url] pair, group name or separate links
+		pending, group, n = list(), unset, 0
+		while not loader.check_event(yaml.SequenceEndEvent):
+			ev = loader.get_event()
+			if n < 2 and isinstance(ev, scalar_events): pending.append((path + [n], scalar(ev)))
+			else:
+				path_item = path + [n]
+				if n == 1 and pending and pending[0][1] is not unset\
+						and not detect_link(pending[0][1]):
+					group, pending = pending[0][1], list()
+					path_item = path + [group]
+				for link in link_scalars(pending): yield link
+				pending = list()
+				for link in walk(ev, path_item): yield link
+			n += 1
+		loader.get_event()
+		for link in ( link_pair(pending)
+			if len(pending) == n == 2 else link_scalars(pending) ): yield link
+		if group is not unset and n != 2: list(link_scalars([(path + [0], group)]))
+
+	def walk_map(path):
+		n = 0
+		while not loader.check_event(yaml.MappingEndEvent):
+			ev, path_item = loader.get_event(), path + ['dict', n]
+			if not isinstance(ev, scalar_events): # complex key
+				for link in walk(ev, path_item): yield link
+				for link in walk(loader.get_event(), path_item): yield link
+			else:
+				key, ev = scalar(ev), loader.get_event()
+				if isinstance(ev, scalar_events): links = link_pair([(path_item + [0], key), (path_item + [1], scalar(ev))])
+				elif key is unset or detect_link(key):
+					links = it.chain(link_scalars([(path_item + [0], key)]), walk(ev, path_item + [1]))
+				else: links = walk(ev, path_item + [key])
+				for link in links: yield link
+			n += 1
+		loader.get_event()
 
-def backlog_process(backlog, spec):
-	if not backlog: return set()
+	with open(path) as src:
+		loader, count = Loader(src), 0
+		try:
+			loader.get_event() # stream start
+			if loader.check_event(yaml.DocumentStartEvent):
+				loader.get_event()
+				for link in walk(loader.get_event(), list()):
+					count += 1
+					yield link
+		finally: loader.dispose()
+	stats.add(backlog=count)
+
+class BacklogIndex(object):
+	'''Memory-mapped index of deduplicated links from backlog yaml.
+		File has a header, utf-8 "url\\0title" records and uint64 offset table at the end,
+			so that any link can be decoded by its number without reading anything else.
+		Becomes stale when size or mtime of the source yaml file changes.'''
+
+	class Stale(Exception): pass
+
+	magic, header = 'ffhomegen.backlog.1\n', struct.Struct('<QdQ')
+
+	def __init__(self, path, src_path):
+		self.path, self.src_path = path, src_path
+		with open(path, 'rb') as src:
+			self.mmap = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ)
+		try:
+			if self.mmap[:len(self.magic)] != self.magic: raise self.Stale('magic mismatch')
+			size, mtime, self.count = self.header.unpack_from(self.mmap, len(self.magic))
+			st = os.stat(src_path)
+			if (size, mtime) != (st.st_size, st.st_mtime): raise self.Stale('source changed')
+			self.table_pos = len(self.mmap) - (self.count + 1) * 8
+		except:
+			self.mmap.close()
+			raise
+
+	@classmethod
+	def build(cls, path, src_path):
+		st, links, offsets = os.stat(src_path), set(), list()
+		with dump_tempfile(path) as dst:
+			dst.write(cls.magic + cls.header.pack(st.st_size, st.st_mtime, 0))
+			for link in backlog_iter(src_path):
+				if link in links: continue
+				links.add(link)
+				offsets.append(dst.tell())
+				dst.write(b'\0'.join(force_bytes(v or '') for v in link))
+			offsets.append(dst.tell())
+			dst.write(struct.pack('<{}Q'.format(len(offsets)), *offsets))
+			dst.seek(len(cls.magic))
+			dst.write(cls.header.pack(st.st_size, st.st_mtime, len(links)))
+
+	def close(self): self.mmap.close()
+
+	def __len__(self): return self.count
+
+	def __getitem__(self, n):
+		if not 0 <= n < self.count: raise IndexError(n)
+		a, b = struct.unpack_from('<2Q', self.mmap, self.table_pos + n * 8)
+		url, title = self.mmap[a:b].split(b'\0', 1)
+		return Link._make((url.decode('utf-8'), title.decode('utf-8') or None))
+
+	def __iter__(self):
+		for n in xrange(self.count): yield self[n]
+
+def backlog_get(path, cache_dir=None):
+	'''Returns BacklogIndex for backlog yaml, (re-)building it in cache_dir if necessary,
+		or backlog_iter generator if cache_dir is not set.'''
+	if not cache_dir: return backlog_iter(path)
+	index_path = join( cache_dir, 'backlog.{}.index'\
+		.format(hashlib.sha256(force_bytes(abspath(path))).hexdigest()[:16]) )
+	if exists(index_path):
+		try: index = BacklogIndex(index_path, path)
+		except (OSError, IOError, ValueError, struct.error, BacklogIndex.Stale) as err:
+			log.debug('Not using backlog index (%s): %s', index_path, err)
+		else:
+			stats.add(cache_hits=1, backlog=len(index))
+			return index
+	if not isdir(cache_dir): os.makedirs(cache_dir)
+	BacklogIndex.build(index_path, path)
+	return BacklogIndex(index_path, path)
+
+backlog_link_key = lambda link: hashlib.sha256(force_bytes(link.url)).hexdigest()[:16]
+
+def backlog_process(backlog, spec, recent=None):
+	'''Picks links from backlog iterable or BacklogIndex, as specified by --backlog-pick option.
+		"random-N" reservoir-samples links from iterable as they are generated, so that only
+				up to N of these are kept in memory, with duplicate links that are not currently
+				in the sample counting as separate candidates.
+			Only picked links get decoded from BacklogIndex.
+		Links with backlog_link_key in "recent" set are only picked if there are no others left.'''
 	match = re.search(r'^random-(\d+)$', spec)
 	if match:
 		random.seed()
-		backlog_subset = set()
-		for n in xrange(int(match.group(1))):
-			if not backlog: break
-			link = random.choice(list(backlog))
-			backlog.remove(link)
+		n, recent, count = int(match.group(1)), recent or set(), 0
+		backlog_subset, backlog_subset_set, backlog_recent = list(), set(), list()
+		if isinstance(backlog, BacklogIndex):
+			picked = set()
+			while len(backlog_subset) < n and len(picked) < len(backlog):
+				m = random.randrange(len(backlog))
+				if m in picked: continue
+				picked.add(m)
+				link = backlog[m]
+				if recent and backlog_link_key(link) in recent: backlog_recent.append(link)
+				else: backlog_subset.append(link)
+		else:
+			for link in backlog:
+				if link in backlog_subset_set: continue
+				if recent and backlog_link_key(link) in recent:
+					if len(backlog_recent) < n: backlog_recent.append(link)
+					continue
+				count += 1
+				if len(backlog_subset) < n: backlog_subset.append(link)
+				else:
+					m = random.randrange(count)
+					if m >= n: continue
+					backlog_subset_set.remove(backlog_subset[m])
+					backlog_subset[m] = link
+				backlog_subset_set.add(link)
+		backlog_subset = set(backlog_subset)
+		for link in backlog_recent:
+			if len(backlog_subset) >= n: break
 			backlog_subset.add(link)
 		return backlog_subset
-	elif spec == 'all': return backlog
+	elif spec == 'all': return set(backlog)
 	else: raise ValueError(spec)
 
 
@@ -303,6 +810,100 @@ def notes_get(path):
 		return src.read().strip().decode('utf-8')
 
 
+def bookmarks_load( db_path, timeout=30,
+		snapshot=False, favicons=False, cache_dir=None, full_sync=False ):
+	'''Returns (bookmarks, FaviconStore) tuple, which can be passed between processes.
+		BookmarksState is kept in cache_dir (if any) between runs, to only fetch changes,
+			unless full_sync is set, in which case it's replaced by a new one.'''
+	state_path = cache_dir and join(cache_dir, 'bookmarks.{}.pickle'.format(
+		hashlib.sha256(force_bytes(abspath(db_path)) + (b'+icons' if favicons else b'')).hexdigest()[:16] ))
+	state = state_path and ( BookmarksState(db_path)
+		if full_sync else BookmarksState.load(state_path, db_path) ) or None
+	favicons = FaviconStore() if favicons else None
+	bms = bookmarks_get( db_path, timeout=timeout,
+		snapshot=snapshot, favicons=favicons, state=state )
+	if state and state.changed: state.save(state_path)
+	stats.add(bookmarks=len(bms), favicons=len(favicons or list()))
+	return dict(bms), favicons or FaviconStore()
+
+def backlog_load(path, spec, cache_dir=None, recent=0):
+	'''Returns processed backlog subset, so that only it has to be passed between processes.
+		Keys of "recent" number of last randomly-picked links are stored in cache_dir.'''
+	backlog, recent_keys = backlog_get(path, cache_dir), list()
+	recent_path = recent and cache_dir and spec != 'all' and join( cache_dir, 'backlog.{}.recent.json'\
+		.format(hashlib.sha256(force_bytes(abspath(path))).hexdigest()[:16]) )
+	if recent_path and exists(recent_path):
+		with open(recent_path) as src: recent_keys = json.load(src)
+	try: backlog = backlog_process(backlog, spec, set(recent_keys))
+	finally:
+		if isinstance(backlog, BacklogIndex): backlog.close()
+	if recent_path:
+		picked = map(backlog_link_key, backlog)
+		recent_keys = list(k for k in recent_keys if k not in picked) + picked
+		if not isdir(cache_dir): os.makedirs(cache_dir)
+		with dump_tempfile(recent_path) as dst: json.dump(recent_keys[-recent:], dst)
+	stats.add(backlog_picked=len(backlog))
+	return backlog
+
+def source_load(task):
+	'Returns (name, result, stats) for a loader, where stats is info for the "load_<name>" stage.'
+	name, func, args = task
+	with stats.stage('load_{}'.format(name)) as info:
+		res = func(*args)
+		if isinstance(res, (list, set, dict)): stats.add(rows=len(res))
+	return name, res, info
+
+class Sources(object):
+	'''Loads named data sources in parallel worker processes (one per cpu by default),
+			or lazily in the same order in this one, if jobs is 0 or 1.
+		Results are returned by name (see "get" method), as soon as each one is ready,
+			and iterating over this object yields names of sources as these get loaded.
+		Loader for each name is a (func, args) tuple or None, if source is disabled.
+		Already loaded sources can be passed in "results" dict, to only load the rest.'''
+
+	def __init__(self, loaders, jobs=None, results=None):
+		self.results, self.pool = dict(results or dict()), None
+		tasks = list( (name,) + tuple(loader)
+			for name, loader in loaders.viewitems() if loader and name not in self.results )
+		self.names = list( name for name, loader in
+			loaders.viewitems() if not loader or name in self.results )
+		for name in self.names: self.results.setdefault(name, None)
+		if jobs is None: jobs = multiprocessing.cpu_count()
+		jobs = min(jobs, len(tasks))
+		if jobs > 1:
+			self.pool = multiprocessing.Pool(jobs)
+			self.pending = self.pool.imap_unordered(source_load, tasks)
+			self.pool.close()
+		else: self.pending = it.imap(source_load, tasks)
+
+	def __enter__(self): return self
+	def __exit__(self, err_t, err, err_tb):
+		if not self.pool: return
+		if err_t: self.pool.terminate()
+		self.pool.join()
+
+	def _load_next(self):
+		name, self.results[name], info = next(self.pending)
+		stats.stages['load_{}'.format(name)] = info # from worker process
+		self.names.append(name)
+		return name
+
+	def __iter__(self):
+		for name in it.chain(list(self.names), iter(self._load_next, None)): yield name
+
+	def get(self, name):
+		while name not in self.results: self._load_next()
+		return self.results[name]
+
+
+def file_mode_default():
+	'Returns umask-default mode for new files, as NamedTemporaryFile always creates these with 0600.'
+	umask = os.umask(0o022)
+	os.umask(umask)
+	return 0o666 & ~umask
+
+file_mode = file_mode_default()
+
 @contextmanager
 def dump_tempfile(path):
 	kws = dict( delete=False,
@@ -311,44 +912,391 @@ def dump_tempfile(path):
 		try:
 			yield tmp
 			tmp.flush()
+			os.fchmod(tmp.fileno(), file_mode)
 			os.rename(tmp.name, path)
 		finally:
 			try: os.unlink(tmp.name)
 			except (OSError, IOError): pass
 
-def dump_tags(bms, dst):
+class JSONIter(object):
+	'Lazy iterable, to be streamed as json list (or object, with items=True) by json_iterencode.'
+	def __init__(self, iterable, items=False): self.iterable, self.items = iterable, items
+
+def json_iterencode(data, encoder=json.JSONEncoder(), batch_len=1000):
+	'''Yields json chunks for data, where JSONIter (incl. nested ones) is encoded
+			item-by-item, without building the whole list/dict in memory first.
+		Everything else is encoded via one-shot JSONEncoder.encode, which uses C speedups,
+			unlike JSONEncoder.iterencode (pure-python one), up to batch_len values at a time.'''
+	if not isinstance(data, JSONIter):
+		yield encoder.encode(data)
+		return
+	yield '{' if data.items else '['
+	vals, sep = iter(data.iterable), ''
+	is_nested = lambda val: isinstance(val[1] if data.items else val, JSONIter)
+	for batch in iter(lambda: list(it.islice(vals, batch_len)), list()):
+		# Runs of up to batch_len non-JSONIter values are encoded at once, as that is much faster
+		for nested, batch in it.groupby(batch, is_nested):
+			if not nested:
+				batch = list(batch)
+				yield sep + encoder.encode(dict(batch) if data.items else batch)[1:-1]
+			else:
+				for val in batch:
+					if data.items:
+						k, val = val
+						sep += '{}: '.format(encoder.encode(k))
+					yield sep
+					for chunk in json_iterencode(val, encoder, batch_len): yield chunk
+					sep = ', '
+			sep = ', '
+	yield '}' if data.items else ']'
+
+def dump_json(dst, name, data):
+	'Writes "name=<json>;" js line to dst, streaming encoded json chunks there.'
+	dst.write('{}='.format(name))
+	dst.writelines(json_iterencode(data))
+	dst.write(';\n')
+
+def tag_color(tag, level=0.3):
+	'''Returns css color for tag, same as d3.hsl(h, s, level).toString() in d3 v3,
+		with h/s from the last two bytes of tag sha256 digest (in reverse order).
+		Note that d3 clamps saturation to 0-1 range, so it's always 1, unless that byte is 0.'''
+	digest = hashlib.sha256(tag.encode('utf-8')).digest()
+	h, s = ord(digest[-1]), min(1, ord(digest[-2]))
+	m2 = level * (1 + s) if level <= .5 else level + s - level * s
+	m1 = 2 * level - m2
+	def v(h):
+		if h > 360: h -= 360
+		elif h < 0: h += 360
+		if h < 60: return m1 + (m2 - m1) * h / 60
+		if h < 180: return m2
+		if h < 240: return m1 + (m2 - m1) * (240 - h) / 60
+		return m1
+	return '#' + ''.join( '{:02x}'.format(
+		int(math.floor(v(h + dh) * 255 + .5))) for dh in [120, 0, -120] )
+
+tag_cloud_glyph_em = dict(
+	[(c, 0.28) for c in u'fijlrt.,:;!|\'-'] + [(c, 0.75) for c in u'mw'] )
+
+def tag_cloud_sprite(text, size, rotate, padding=1):
+	'''Returns (x0, y0, rows) bitmask sprite of svg text with font size (px) and rotation (degrees),
+			anchored in the middle of its baseline, with x0/y0 offsets of the first row/bit from that point.
+		Unlike canvas-rendered glyph sprites in d3-cloud, text is approximated by a box,
+			with width from rough per-char widths and height by presence of ascenders/descenders.'''
+	w = size * sum( tag_cloud_glyph_em.get(c,
+		0.6 if c.isupper() or c.isdigit() else 0.5) for c in text ) / 2.0 + padding
+	top = size * (0.52 if set(text).issubset(u'acegmnopqrsuvwxyz') else 0.72) + padding
+	bottom = size * (0.22 if set(text).intersection(u'gjpqy,;') else 0.02) + padding
+	rs, rc = math.sin(math.radians(rotate)), math.cos(math.radians(rotate))
+	pts = list((x*rc - y*rs, x*rs + y*rc) for x, y in [(-w, -top), (w, -top), (w, bottom), (-w, bottom)])
+	x0, y0 = int(math.floor(min(p[0] for p in pts))), int(math.floor(min(p[1] for p in pts)))
+	rows = list()
+	for y in xrange(y0, int(math.ceil(max(p[1] for p in pts)))):
+		xs = list()
+		for (ax, ay), (bx, by) in zip(pts, pts[1:] + pts[:1]):
+			if ay > by: (ax, ay), (bx, by) = (bx, by), (ax, ay)
+			lo, hi = max(ay, y), min(by, y + 1)
+			if lo > hi: continue
+			if ay == by: xs.extend([ax, bx])
+			else: xs.extend(ax + (bx - ax) * (v - ay) / (by - ay) for v in [lo, hi])
+		a, b = int(math.floor(min(xs))) - x0, int(math.ceil(max(xs))) - x0
+		rows.append(((1 << (b - a)) - 1) << a)
+	return x0, y0, rows
+
+def tag_cloud_font_sizes(tags, font_px=16, font_extent=(0.9, 3.5)):
+	'''Returns (tag, font_size) list for {tag, value} dicts, sorted biggest-first (then by tag),
+		with integer px font size scaled linearly by value, same as in main.coffee.'''
+	if not tags: return list()
+	v_min, v_max = min(t['value'] for t in tags), max(t['value'] for t in tags)
+	fs_min, fs_max = font_px * font_extent[0], font_px * font_extent[1]
+	font_size = lambda v: int( fs_min if v_max == v_min
+		else fs_min + (fs_max - fs_min) * float(v - v_min) / (v_max - v_min) )
+	return sorted(((t['tag'], font_size(t['value'])) for t in tags), key=lambda (t, fs): (-fs, t))
+
+def tag_cloud_layout(tags, size, rng=random):
+	'''Python version of d3.layout.cloud, as it is used in main.coffee -
+			(tag, font_size) tuples (see tag_cloud_font_sizes) are placed in the same order
+			on archimedean spiral from random point near the center,
+			with random -90-60 degree rotation in 30-degree steps.
+		Placement is checked against bitmask of the size=(w, h) box, with python ints as its rows.
+		Returns ({tag, size, rotate, x, y} list with x/y relative to the box center, bounds),
+			same as what d3-cloud passes to "end" event, with tags that did not fit skipped.'''
+	w, h = size
+	if not tags: return list(), None
+	board, bounds, words = [0] * h, None, list()
+
+	# Spiral steps that can't fit into the box are dropped, as js version only skips these,
+	#  same as repeated ones near the center, which would be checked against the same position
+	spiral_e, spiral = float(w) / h, list()
+	for t in xrange(int(math.hypot(w, h) * 10) + 1):
+		dx, dy = int(spiral_e * t * .1 * math.cos(t * .1)), int(t * .1 * math.sin(t * .1))
+		if abs(dx) >= w or abs(dy) >= h or (spiral and spiral[-1] == (dx, dy)): continue
+		spiral.append((dx, dy))
+	spirals = {1: spiral, -1: list((-dx, dy) for dx, dy in spiral)}
+
+	for tag, fs in tags:
+		rotate = (int(rng.random() * 6) - 3) * 30
+		x, y = int(w * (rng.random() + .5)) >> 1, int(h * (rng.random() + .5)) >> 1
+		x0, y0, rows = tag_cloud_sprite(tag, fs, rotate)
+		x1, y1 = x0 + max(row.bit_length() for row in rows), y0 + len(rows)
+		# Middle row is checked first and separately, as it is most likely to hit other tags
+		rows_check = sorted(enumerate(rows), key=lambda (n, row): abs(n - len(rows) // 2))
+		(ym, row_m), rows_check = rows_check[0], rows_check[1:]
+		spiral = spirals[1 if rng.random() < .5 else -1]
+		# Position ranges to be within the box and overlap bounds of already-placed tags
+		(tx_min, ty_min), (tx_max, ty_max) = (-x0, -y0), (w - x1, h - y1)
+		if bounds:
+			tx_min, ty_min = max(tx_min, bounds[0] - x1 + 1), max(ty_min, bounds[1] - y1 + 1)
+			tx_max, ty_max = min(tx_max, bounds[2] - x0 - 1), min(ty_max, bounds[3] - y0 - 1)
+		for dx, dy in spiral:
+			tx, ty = x + dx, y + dy
+			if not (tx_min <= tx <= tx_max and ty_min <= ty <= ty_max): continue
+			bx, by = tx + x0, ty + y0
+			if bounds and ( board[by + ym] & (row_m << bx)
+				or any(board[by + n] & (row << bx) for n, row in rows_check) ): continue
+			for n, row in enumerate(rows): board[by + n] |= row << bx
+			box = [bx, by, tx + x1, ty + y1]
+			bounds = box if not bounds else\
+				map(min, bounds[:2], box[:2]) + map(max, bounds[2:], box[2:])
+			words.append(dict(tag=tag, size=fs, rotate=rotate, x=tx - (w >> 1), y=ty - (h >> 1)))
+			break
+	return words, bounds and [dict(x=bounds[0], y=bounds[1]), dict(x=bounds[2], y=bounds[3])]
+
+def tag_cloud_layouts(tags, sizes, font_px=16, cache_dir=None):
+	'''Returns list of {size, font, words, bounds} tag_cloud_layout dicts for each (w, h) size.
+		Random numbers for each layout are seeded by tag names with their font sizes, box size and font,
+			and results are cached in cache_dir (if any) by same key, so that layout only changes with these,
+			and not with tag values, unless they change font size of some tag (at least by 1px).'''
+	tags, layouts = tag_cloud_font_sizes(tags, font_px), list()
+	for w, h in sizes:
+		key = hashlib.sha256(json.dumps([tags, w, h, font_px])).hexdigest()[:16]
+		cache_path = cache_dir and join(cache_dir, 'tag_cloud.{}.json'.format(key))
+		if cache_path and exists(cache_path):
+			try:
+				with open(cache_path) as src: layouts.append(json.load(src))
+			except Exception as err:
+				log.debug('Failed to load tag cloud layout cache (%s): %s', cache_path, err)
+			else:
+				stats.add(cache_hits=1)
+				continue
+		words, bounds = tag_cloud_layout(tags, (w, h), rng=random.Random(key))
+		layouts.append(dict(size=[w, h], font=font_px, words=words, bounds=bounds))
+		stats.add(tag_cloud_layouts=1, tag_cloud_words=len(words))
+		if cache_path:
+			if not isdir(cache_dir): os.makedirs(cache_dir)
+			with dump_tempfile(cache_path) as dst: json.dump(layouts[-1], dst)
+	return layouts
+
+def tag_edges( link_tags, tag_counts,
+		top=20, min_count=1, score='count', threshold=None, max_edges=10000 ):
+	'''Returns {id1: {id2: count}} tag co-occurrence index for integer tag ids (0...len(tag_counts)),
+			given list of tag ids for each link and number of links for each tag id.
+		Graph is pruned to edges with at least min_count common links and score
+				(count, pmi or jaccard) of at least "threshold" (if not None),
+			which are among "top" best-scoring ones for either of the tags,
+			and then to max_edges best-scoring ones in total (0 - no limit).'''
+	n, counts = len(tag_counts), defaultdict(int) # (id1 * n + id2) keys, to avoid tuples
+	for ids in link_tags:
+		for a, b in it.combinations(sorted(ids), 2): counts[a * n + b] += 1
+	links_total = float(len(link_tags))
+	score = None if score == 'count' else dict(
+		pmi=lambda c, a, b: math.log(c * links_total / (tag_counts[a] * tag_counts[b])),
+		jaccard=lambda c, a, b: float(c) / (tag_counts[a] + tag_counts[b] - c) )[score]
+	stats.add(tag_edges=len(counts))
+	# Edges are (score, -key) tuples, sorted best-first, with lower ids first for same score
+	if not score: edges = list((c, -k) for k, c in counts.viewitems() if c >= min_count)
+	else:
+		edges = list( (score(c, k // n, k % n), -k)
+			for k, c in counts.viewitems() if c >= min_count )
+	if threshold is not None: edges = list(e for e in edges if e[0] >= threshold)
+	edges.sort(reverse=True)
+	if top: # edges are visited in best-first order for each tag, so rank is a position there
+		rank, edges_top = [0] * n, list()
+		for edge in edges:
+			a, b = -edge[1] // n, -edge[1] % n
+			if rank[a] < top or rank[b] < top:
+				edges_top.append(edge)
+				if len(edges_top) == max_edges: break
+			rank[a] += 1
+			rank[b] += 1
+		edges = edges_top
+	if max_edges: edges = edges[:max_edges]
+	stats.add(tag_edges_kept=len(edges))
+	index = defaultdict(dict)
+	for v, k in edges:
+		a, b = -k // n, -k % n
+		index[a][b] = index[b][a] = counts[-k]
+	return index
+
+def dump_tags( bms, dst, layout_sizes=None,
+		layout_font=16, cache_dir=None, edges_prune=None ):
+	'''Dumps normalized and pre-indexed tag data, so that page won't have to do it:
+		ffhome_tags.links - list of unique links, with "tags" as indexes in tags list (sorted by name).
+		ffhome_tags.tags - {tag, value, links, color, edge_range} dicts sorted by value,
+			with "links" as indexes in links list, sorted by frecency,
+			css color (see tag_color) and [min, max] of co-occurrence counts with other tags.
+		ffhome_tag_edges - {tag1: {tag2: count}} adjacency index of tag co-occurrence,
+			pruned by tag_edges with edges_prune keywords, if any.
+		ffhome_tag_layouts - tag_cloud_layouts for (w, h) layout_sizes, if any.'''
 	# Assuming that character case doesn't matter for tags
-	tags, edges, links = defaultdict(int), defaultdict(int), defaultdict(dict)
+	tags, links = defaultdict(list), list()
 	for bm in bms.viewvalues():
+		bm_tags = sorted(set(tag.lower() for tag in bm['bm_tags']))
+		if not bm_tags: continue
 		title = bm.get('bm_title') or bm['title']
-		link = dict(title=title, url=bm['url'], frecency=bm['frecency'])
-		for tag in bm['bm_tags']:
-			tag = tag.lower()
-			tags[tag] += 1
-			links[tag][link['url']] = link # dedup by url
-		if len(bm['bm_tags']) > 1:
-			for tag_pair in it.combinations(bm['bm_tags'], 2):
-				edges[tuple(sorted(tag_pair))] += 1
-	for tag in links:
-		tags[tag] = dict(value=tags[tag], links=links[tag].values())
-	edges = list((t1, t2, v) for (t1,t2),v in edges.viewitems() if v > 0)
-	dst.write(
-		'ffhome_tags={};\nffhome_tag_edges={};\n'\
-		.format(json.dumps(tags), json.dumps(edges)) )
+		link = dict(title=title, url=bm['url'], frecency=bm['frecency'], tags=bm_tags)
+		if bm.get('favicon'): link['favicon'] = bm['favicon']
+		for tag in bm_tags: tags[tag].append(len(links))
+		links.append(link)
+
+	tag_list = sorted(tags, key=lambda tag: (-len(tags[tag]), tag))
+	tag_idx = dict((tag, n) for n, tag in enumerate(tag_list))
+	for link in links: link['tags'] = map(tag_idx.get, link['tags'])
+	link_frecency = lambda n: (-links[n]['frecency'], n)
+	tag_list = list(
+		dict(tag=tag, value=len(tags[tag]), links=sorted(tags[tag], key=link_frecency))
+		for tag in tag_list )
+
+	edges = tag_edges( list(link['tags'] for link in links),
+		list(tag['value'] for tag in tag_list), **(edges_prune or dict()) )
+	edges_index = dict( (tag_list[a]['tag'], dict((tag_list[b]['tag'], v) for b, v in neighbors.viewitems()))
+		for a, neighbors in edges.viewitems() )
+	for n, tag in enumerate(tag_list):
+		counts = edges[n].values() if n in edges else [0]
+		tag.update(color=tag_color(tag['tag']), edge_range=[min(counts), max(counts)])
+
+	dump_json(dst, 'ffhome_tags', JSONIter(
+		[('links', JSONIter(links)), ('tags', JSONIter(tag_list))], items=True ))
+	dump_json(dst, 'ffhome_tag_edges', edges_index)
+	if layout_sizes:
+		with stats.stage('tag_cloud_layouts'):
+			layouts = tag_cloud_layouts(tag_list, layout_sizes, layout_font, cache_dir)
+		dump_json(dst, 'ffhome_tag_layouts', layouts)
 
 def dump_backlog(links, dst):
-	dst.write('ffhome_backlog={};\n'.format(json.dumps(
-		list(dict(title=link.title, url=link.url) for link in links) )))
+	dump_json(dst, 'ffhome_backlog', JSONIter(
+		dict(title=link.title, url=link.url) for link in links ))
 
 def dump_links(links, dst):
-	dst.write('ffhome_links={};\n'.format(json.dumps(
-		list(dict(title=link.title, url=link.url) for link in links) )))
+	dump_json(dst, 'ffhome_links', JSONIter(
+		dict(title=link.title, url=link.url) for link in links ))
+
+def dump_places(places, dst):
+	dump_json(dst, 'ffhome_places', JSONIter(
+		dict((k, p[k]) for k in ['url', 'title', 'host', 'visits', 'frecency', 'last_visit'])
+		for p in places ))
 
 def dump_notes(notes, dst):
-	dst.write('ffhome_notes={};\n'.format(json.dumps(notes)))
+	dump_json(dst, 'ffhome_notes', notes)
+
+def dump_favicons(favicons, dst, files_path=None):
+	'''Dumps {key: url} favicon table, with either data-urls (if files_path is None),
+		or relative paths to content-hashed files, written to "favicons" dir in files_path.'''
+	if files_path is not None:
+		urls = dict()
+		files_dir = join(files_path, 'favicons')
+		if favicons and not isdir(files_dir): os.makedirs(files_dir)
+		for key in favicons:
+			urls[key] = 'favicons/{}'.format(favicons.filename(key))
+			path = join(files_path, urls[key])
+			if exists(path): continue # same hash - same contents
+			with dump_tempfile(path) as tmp: tmp.write(favicons[key][1])
+			stats.add(files=1, files_bytes=len(favicons[key][1]))
+		files = set(basename(url) for url in urls.viewvalues())
+		for name in os.listdir(files_dir) if isdir(files_dir) else list():
+			if name not in files: os.unlink(join(files_dir, name))
+	else: # data-urls are only encoded one at a time, as they get written
+		urls = JSONIter(((key, favicons.data_url(key)) for key in favicons), items=True)
+	dump_json(dst, 'ffhome_favicons', urls)
+
+class OutputManifest(dict):
+	'''{name: [source, stat]} record of files written to output dir, where "source"
+			is a signature of what file was made from and "stat" is its size/mtime right after.
+		Used to skip replacing files that did not change since the last run,
+			and to remove ones that are no longer generated.'''
+
+	filename = '.ffhomegen.manifest.json'
+
+	def __init__(self, path):
+		super(OutputManifest, self).__init__()
+		self.path, self.seen = path, set()
+		try:
+			with open(join(path, self.filename)) as src: self.update(json.load(src))
+		except (OSError, IOError, ValueError): pass
+
+	def stat(self, name):
+		try: st = os.lstat(join(self.path, name))
+		except OSError: return None
+		return [st.st_size, st.st_mtime]
+
+	def check(self, name, source):
+		'Returns True if file was made from same source and was not changed since.'
+		self.seen.add(name)
+		if self.get(name) != [source, self.stat(name)]: return False
+		stats.add(files_skipped=1)
+		return True
+
+	def record(self, name, source):
+		self[name] = [source, self.stat(name)]
+		stats.add(files=1)
+
+	@contextmanager
+	def dump(self, name, gz=False):
+		'''Same as dump_tempfile, but only replaces file,
+				if hash of the new contents differs from the recorded one.
+			If "gz" is set, gzip-compressed "<name>.gz" copy is updated in the same way.'''
+		path = join(self.path, name)
+		with NamedTemporaryFile(delete=False, dir=dirname(path), prefix=basename(path)+'.') as tmp:
+			try:
+				yield tmp
+				tmp.flush()
+				tmp.seek(0)
+				digest = hashlib.sha256()
+				for chunk in iter(ft.partial(tmp.read, 2**20), ''): digest.update(chunk)
+				digest = digest.hexdigest()
+				if not self.check(name, digest):
+					os.fchmod(tmp.fileno(), file_mode)
+					os.rename(tmp.name, path)
+					self.record(name, digest)
+				if gz and not self.check(name + '.gz', digest + ':gz'):
+					tmp.seek(0)
+					with dump_tempfile(path + '.gz') as dst,\
+							closing(gzip.GzipFile('', 'wb', 9, dst, mtime=0)) as dst_gz:
+						for chunk in iter(ft.partial(tmp.read, 2**20), ''): dst_gz.write(chunk)
+					self.record(name + '.gz', digest + ':gz')
+			finally:
+				try: os.unlink(tmp.name)
+				except (OSError, IOError): pass
+
+	def cleanup(self):
+		'Removes files from previous runs which were not checked during this one.'
+		for name in set(self).difference(self.seen):
+			try: os.unlink(join(self.path, name))
+			except OSError: pass
+			else: stats.add(files_removed=1)
+			del self[name]
+
+	def write(self, name, data, gz=False):
+		'''Writes data to a file, unless same data was written there on the previous run,
+			along with gzip-compressed "<name>.gz" copy of it, if "gz" is set.'''
+		digest = hashlib.sha256(data).hexdigest()
+		for name, source, compress in [(name, digest, False), (name + '.gz', digest + ':gz', True)][:gz + 1]:
+			if self.check(name, source): continue
+			path = join(self.path, name)
+			if not isdir(dirname(path)): os.makedirs(dirname(path))
+			with dump_tempfile(path) as dst:
+				if not compress: dst.write(data)
+				else:
+					with closing(gzip.GzipFile('', 'wb', 9, dst, mtime=0)) as dst_gz: dst_gz.write(data)
+			self.record(name, source)
+
+	def save(self):
+		with dump_tempfile(join(self.path, self.filename)) as dst: json.dump(self, dst)
 
-def copy_parts(src_path, dst_path, symlink=False, hardlink=False):
+def copy_parts(src_path, dst_path, symlink=False, hardlink=False, manifest=None):
+	'''Copies or links all files from src_path to dst_path.
+		With OutputManifest passed, files that did not change since the last run are skipped.'''
 	assert not (symlink and hardlink)
+	mode = 'symlink' if symlink else 'hardlink' if hardlink else 'copy'
 	src_path_abs = realpath(src_path)
 	for root, dirs, files in os.walk(src_path_abs):
 		assert root.startswith(src_path_abs), [root, src_path_abs]
@@ -356,14 +1304,162 @@ def copy_parts(src_path, dst_path, symlink=False, hardlink=False):
 		for f in files:
 			if not exists(dst): os.makedirs(dst)
 			src_file, dst_file = join(root, f), join(dst, f)
-			if exists(dst_file): os.unlink(dst_file)
-			if symlink: os.symlink(realpath(src_file), dst_file)
-			elif hardlink: os.link(src_file, dst_file)
-			else: shutil.copyfile(src_file, dst_file)
-
-
-def dump_fat_html(src_path, dst, json_dumps):
-	dump_tag = lambda tag,body,indent='',opts='': dst.write('\n'.join([
+			if manifest is not None:
+				name, st = join(root[len(src_path_abs) + 1:], f), os.stat(src_file)
+				source = [mode, st.st_size, st.st_mtime]
+				if manifest.check(name, source): continue
+			if mode == 'copy':
+				with open(src_file, 'rb') as src, dump_tempfile(dst_file) as tmp:
+					shutil.copyfileobj(src, tmp)
+			else:
+				if lexists(dst_file): os.unlink(dst_file)
+				if symlink: os.symlink(realpath(src_file), dst_file)
+				else: os.link(src_file, dst_file)
+			if manifest is not None: manifest.record(name, source)
+			else: stats.add(files=1)
+
+js_minify_tokens = re.compile(r'''
+	(?P<space>[ \t\r\f\v\n]+) | (?P<comment>//[^\n]*|/\*.*?\*/) |
+	(?P<str>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*') |
+	(?P<regexp>/(?![*/])(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-zA-Z]*) |
+	(?P<word>[\w$\\\x80-\xff]+) | (?P<punct>.)''', re.S | re.X)
+js_minify_regexp_after = set('(,=:[!&|?{};+-*%<>~^') | set([ None, 'cond)', # ")" after if/while/... condition
+	'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw', 'case', 'do', 'else' ])
+
+def js_minify(src):
+	'''Removes comments and whitespace from js code, without renaming or rewriting anything else.
+		Line breaks are only removed where these can't end a statement (after "{", "(", "," and such),
+			so that automatic semicolon insertion works same as before.
+		Parentheses are matched to tell regexp after if/while/for/with condition from division.
+		Raises ValueError on template literals and unbalanced parentheses, which it can't handle.'''
+	res, prev, gap, pos, parens = list(), None, None, 0, list() # gap = None (no whitespace), "" or "\n"
+	while pos < len(src):
+		m = js_minify_tokens.match(src, pos)
+		kind, token = m.lastgroup, m.group()
+		if token == '`': raise ValueError('Template literal at offset {}'.format(pos))
+		if kind == 'regexp' and prev not in js_minify_regexp_after: kind, token = 'punct', '/' # division
+		if token == '(': parens.append(prev)
+		elif token == ')':
+			if not parens: raise ValueError('Unbalanced parentheses at offset {}'.format(pos))
+			if parens.pop() in ['if', 'while', 'for', 'with']: kind = 'cond)'
+		pos += len(token)
+		if kind == 'space' or kind == 'comment':
+			if '\n' in token: gap = '\n'
+			elif gap is None: gap = ''
+			continue
+		if gap is not None and prev is not None:
+			a, b = res[-1][-1], token[0]
+			if gap == '\n' and not (a in '{;,([=:?&|!~^*%<>' or b in '}),;].?:'): res.append('\n')
+			elif ( (a.isalnum() or a in '_$\\' or a > '\x7f') and (b.isalnum() or b in '_$\\' or b > '\x7f')
+					or (a in '+-' and a == b) or (a == '/' and b in '/*')
+					or (b == '.' and res[-1].isdigit()) ): res.append(' ')
+		res.append(token)
+		prev, gap = token if kind in ['word', 'punct'] else kind, None
+	return ''.join(res) + '\n'
+
+css_minify_tokens = re.compile(r'''
+	(?P<space>\s+) | (?P<comment>/\*.*?\*/) |
+	(?P<str>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*') |
+	(?P<other>[^\s"'/{};,>:]+|.)''', re.S | re.X)
+
+def css_minify(src):
+	'Removes comments, whitespace around {};,>: (but not before ":") and last ";" in blocks from css.'
+	res, gap = list(), False
+	for m in css_minify_tokens.finditer(src):
+		kind, token = m.lastgroup, m.group()
+		if kind == 'space' or kind == 'comment':
+			gap = True
+			continue
+		if gap and res and not (res[-1][-1] in '{};,>:' or token[0] in '{};,>'): res.append(' ')
+		if token == '}' and res and res[-1] == ';': res.pop()
+		res.append(token)
+		gap = False
+	return ''.join(res) + '\n'
+
+asset_minifiers = {'.js': js_minify, '.css': css_minify}
+asset_minify_version = 2 # should be bumped on any changes to minifiers above, to invalidate cache
+
+def asset_build(path, minify=True, cache_dir=None):
+	'''Returns contents of the asset file, minified (if "minify" is set and it's js/css),
+		with minified data cached in cache_dir (if any) by sha256 of the source and asset_minify_version.'''
+	with open(path, 'rb') as src: data = src.read()
+	ext = splitext(path)[1]
+	if not minify or ext not in asset_minifiers: return data
+	cache_path = cache_dir and join( cache_dir, 'asset.{}.min{}'.format(
+		hashlib.sha256(b'{}\0{}'.format(asset_minify_version, data)).hexdigest()[:16], ext ) )
+	if cache_path and exists(cache_path):
+		with open(cache_path, 'rb') as src:
+			stats.add(cache_hits=1)
+			return src.read()
+	with stats.stage('asset_minify'):
+		try: size, data = len(data), asset_minifiers[ext](data)
+		except ValueError as err: log.warn('Failed to minify asset, using it as-is (%s): %s', path, err)
+		else: stats.add(files=1, bytes_saved=size - len(data))
+	if cache_path:
+		if not isdir(cache_dir): os.makedirs(cache_dir)
+		with dump_tempfile(cache_path) as dst: dst.write(data)
+	return data
+
+def asset_store(name, data, assets_path):
+	'''Stores asset file data under content-versioned name (e.g. "js/d3.<hash>.js") in assets_path,
+			unless it's already there, returning path to it.
+		Files there are never modified, so that any number of pages can link them,
+			and browser can cache each one until the next version (under a different name).'''
+	name, ext = splitext(name)
+	path = join(assets_path, '{}.{}{}'.format(name, hashlib.sha256(data).hexdigest()[:16], ext))
+	if not exists(path):
+		if not isdir(dirname(path)): os.makedirs(dirname(path))
+		with dump_tempfile(path) as dst: dst.write(data)
+		stats.add(files=1, bytes=len(data))
+	return path
+
+def parts_build(src_path, minify=True, cache_dir=None):
+	'''Returns (html, assets) tuple for "dir" output, where "html" is index.html from src_path,
+			with all js/css/img files linked there renamed to content-versioned names
+			(e.g. "js/d3.<hash>.js"), so that these can be cached by the browser indefinitely,
+		and "assets" is a {name: data} dict of these files, minified via asset_build, if "minify" is set.'''
+	assets = OrderedDict()
+	def asset_name(m):
+		name, ext = splitext(m.group(2))
+		data = asset_build(join(src_path, m.group(2)), minify, cache_dir)
+		name = '{}.{}{}'.format(name, hashlib.sha256(data).hexdigest()[:16], ext)
+		assets[name] = data
+		return '{}{}"'.format(m.group(1), name)
+	with open(join(src_path, 'index.html'), 'rb') as src: html = src.read()
+	html = re.sub(r'(\s(?:src|href)=")((?:js|css|img)/[^"]+)"', asset_name, html)
+	return html, assets
+
+def dump_parts(parts, manifest):
+	'''Writes (html, assets) from parts_build to manifest dir as index.html and asset files,
+		along with gzip-compressed ".gz" copies of text files, for web servers to use as-is.'''
+	html, assets = parts
+	for name, data in assets.viewitems():
+		manifest.write(name, data, gz=splitext(name)[1] in ['.js', '.css'])
+	manifest.write('index.html', html, gz=True)
+
+def fat_html_compile(src_path, assets_path=None, minify=True, cache_dir=None):
+	'''Returns (chunks, deps) tuple for a "fat" html template.
+		"chunks" is a list of static html chunks (with all assets embedded),
+			interleaved with names of json_dumps slots to fill in between these,
+			i.e. [html, json_name, html, json_name, ..., html].
+		"deps" is a list of all files used for it, to check cache validity.
+		If assets_path is specified, js/css/img files are not embedded, but stored there
+			via asset_store and linked by file:// URLs instead ("lean" html).
+		js/css files are minified via asset_build, if "minify" is set.'''
+	chunks, deps = [io.BytesIO()], [abspath(__file__)]
+	write = lambda data: chunks[-1].write(data)
+	def read(path):
+		deps.append(abspath(path))
+		with open(path) as src: return src.read()
+	def read_asset(path):
+		deps.append(abspath(path))
+		return asset_build(path, minify, cache_dir)
+	def asset_url(name):
+		path = asset_store(name, read_asset(join(src_path, name)), assets_path)
+		deps.append(abspath(path))
+		return 'file://{}'.format(urllib.quote(abspath(path)))
+
+	dump_tag = lambda tag,body,indent='',opts='': write('\n'.join([
 		'{}<{}{}>'.format(indent, tag, opts), body.strip('\n'), '{}</{}>'.format(indent, tag), '' ]))
 	dump_js = ft.partial(dump_tag, 'script')
 	dump_css = ft.partial(dump_tag, 'style')
@@ -373,65 +1469,487 @@ def dump_fat_html(src_path, dst, json_dumps):
 		if isdir(join(src_path, k)): not_found.add(k)
 
 	# Parsing html with regexps \o/
-	with open(join(src_path, 'index.html')) as src:
-		for line in iter(src.readline, ''):
-			match = re.search( r'^(?P<indent>\s*)'
-				r'<script src="(?P<src>[^"]+)"></script>\s*$', line )
-			if match:
-				indent, js_path = match.group('indent'), match.group('src')
-				if js_path.startswith('js/'):
-					assert js_path.endswith('.js'), js_path
-					with open(join(src_path, js_path)) as js_src: js = js_src.read()
-					dump_js(js, indent)
-					not_found.discard('js')
-				else:
-					assert js_path.endswith('.json'), js_path
-					json = js_path[:-5]
-					with io.BytesIO() as buff:
-						if json in json_dumps:
-							json_dumps[json](buff)
-							dump_js(buff.getvalue(), indent)
-						else: raise ValueError(js_path)
-					not_found.discard('json')
-				continue
+	for line in io.BytesIO(read(join(src_path, 'index.html'))):
+		match = re.search( r'^(?P<indent>\s*)'
+			r'<script src="(?P<src>[^"]+)"></script>\s*$', line )
+		if match:
+			indent, js_path = match.group('indent'), match.group('src')
+			if js_path.startswith('js/'):
+				assert js_path.endswith('.js'), js_path
+				if assets_path: write(line.replace(js_path, asset_url(js_path)))
+				else: dump_js(read_asset(join(src_path, js_path)), indent)
+				not_found.discard('js')
+			else:
+				assert js_path.endswith('.json'), js_path
+				# dump_* output always ends with newline
+				write('{}<script>\n'.format(indent))
+				chunks.extend([js_path[:-5], io.BytesIO()])
+				write('{}</script>\n'.format(indent))
+				not_found.discard('json')
+			continue
 
-			match = re.search( r'^(?P<indent>\s*)'
-				r'<link rel="stylesheet" href="(?P<src>[^"]+)">\s*$', line )
-			if match:
-				indent, css_path = match.group('indent'), match.group('src')
-				assert css_path.startswith('css/'), css_path
-				with open(join(src_path, css_path)) as css_src: css = css_src.read()
-				dump_css(css, indent)
-				not_found.discard('css')
-				continue
+		match = re.search( r'^(?P<indent>\s*)'
+			r'<link rel="stylesheet" href="(?P<src>[^"]+)">\s*$', line )
+		if match:
+			indent, css_path = match.group('indent'), match.group('src')
+			assert css_path.startswith('css/'), css_path
+			if assets_path: write(line.replace(css_path, asset_url(css_path)))
+			else: dump_css(read_asset(join(src_path, css_path)), indent)
+			not_found.discard('css')
+			continue
 
-			match = list(re.finditer(r'<img\s+[^>]+?\s+src="(?P<src>[^"]+)"(\s+[^>]+)?>\s*$', line))
-			if match:
-				pos = type('pos', (object,), dict(n=0))
-				def pos_update(m, write=False):
-					if write is not False:
-						if write is True: write = line[pos.n:m]
-						dst.write(write)
-					pos.n = m
-				pos_update(match[0].start(), True)
-				for match in match:
-					src = match.group('src')
-					pos_update(match.start('src'), True)
+		match = list(re.finditer(r'<img\s+[^>]+?\s+src="(?P<src>[^"]+)"(\s+[^>]+)?>\s*$', line))
+		if match:
+			pos = type('pos', (object,), dict(n=0))
+			def pos_update(m, data=False):
+				if data is not False:
+					if data is True: data = line[pos.n:m]
+					write(data)
+				pos.n = m
+			pos_update(match[0].start(), True)
+			for match in match:
+				src = match.group('src')
+				pos_update(match.start('src'), True)
+				if assets_path: img = asset_url(src)
+				else:
 					img_path = join(src_path, src)
 					mime, enc = mimetypes.guess_type(img_path)
-					with open(img_path) as img_src: img = img_src.read()
-					img = 'data:{};base64,{}'.format(mime, img.encode('base64').replace('\n', ''))
-					pos_update(match.end('src'), img)
-				pos_update(match.end(), True)
-				not_found.discard('img')
-				continue
+					img = 'data:{};base64,{}'.format(mime, read(img_path).encode('base64').replace('\n', ''))
+				pos_update(match.end('src'), img)
+			pos_update(match.end(), True)
+			not_found.discard('img')
+			continue
 
-			if not match:
-				dst.write(line)
-				continue
+		if not match:
+			write(line)
+			continue
 
 	assert not not_found, not_found
-
+	chunks = list((chunk if n % 2 else chunk.getvalue()) for n, chunk in enumerate(chunks))
+	return chunks, deps
+
+def fat_html_template(src_path, cache_dir=None, assets_path=None, minify=True):
+	'''Returns chunks from fat_html_compile, cached in cache_dir (if any),
+		until any of the files used to build these changes (by size or mtime).'''
+	deps_stat = lambda deps: list(
+		(p, os.stat(p).st_size, os.stat(p).st_mtime) if exists(p) else (p, None, None) for p in deps )
+	cache_path = cache_dir and join( cache_dir, '{}_html.{}.pickle'.format(
+		'lean' if assets_path else 'fat', hashlib.sha256(force_bytes(abspath(src_path))
+			+ (b'\0' + force_bytes(abspath(assets_path)) if assets_path else b'')
+			+ (b'\0minify{}'.format(asset_minify_version) if minify else b'')).hexdigest()[:16] ) )
+	if cache_path and exists(cache_path):
+		try:
+			with open(cache_path, 'rb') as src: chunks, deps = pickle.load(src)
+		except Exception as err:
+			log.debug('Failed to load fat html template cache (%s): %s', cache_path, err)
+		else:
+			if deps_stat(map(op.itemgetter(0), deps)) == deps:
+				stats.add(cache_hits=1)
+				return chunks
+			log.debug('Fat html template cache is stale: %s', cache_path)
+	chunks, deps = fat_html_compile(src_path, assets_path, minify, cache_dir)
+	if cache_path:
+		if not isdir(cache_dir): os.makedirs(cache_dir)
+		with dump_tempfile(cache_path) as dst:
+			pickle.dump((chunks, deps_stat(deps)), dst, pickle.HIGHEST_PROTOCOL)
+	return chunks
+
+def dump_fat_html( src_path, dst, json_dumps,
+		cache_dir=None, assets_path=None, minify=True, chunks=None ):
+	if chunks is None:
+		with stats.stage('fat_html_template'):
+			chunks = fat_html_template(src_path, cache_dir, assets_path, minify)
+	for n, chunk in enumerate(chunks):
+		if not n % 2: dst.write(chunk)
+		elif chunk in json_dumps: json_dumps[chunk](dst)
+		else: raise ValueError('{}.json'.format(chunk))
+
+
+class FileWatcher(object):
+	'''Watches {path: key} files and dirs (recursively) for changes, using inotify via ctypes
+			on linux, or polling size/mtime of these every poll_interval seconds otherwise.
+		Iterating over it yields sets of keys for changed paths,
+			once there were no new changes for "delay" seconds.
+		Missing and empty files are considered to be same, so that e.g. sqlite
+			removing or re-creating empty journals does not count as a change.'''
+
+	inotify_event = struct.Struct('iIII')
+	inotify_mask = 0x2 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200 # modify, close_write, moves, create, delete
+	inotify_overflow, inotify_isdir = 0x4000, 0x40000000
+
+	def __init__(self, paths, delay=0.5, poll_interval=2.0):
+		self.paths, self.delay, self.poll_interval = paths, delay, poll_interval
+		self.state = dict((key, self.state_get(key)) for key in set(paths.viewvalues()))
+		self.fd, self.poll_state = None, self.state.copy()
+		try: self.inotify_init()
+		except (OSError, AttributeError) as err:
+			log.warn('Failed to setup inotify watches, polling files instead: %s', err)
+			if self.fd is not None: os.close(self.fd)
+			self.fd = None
+
+	def state_get(self, key):
+		state = list()
+		for path in sorted(p for p, k in self.paths.viewitems() if k == key):
+			if isdir(path):
+				for root, dirs, files in os.walk(path):
+					for name in files:
+						try: st = os.stat(join(root, name))
+						except OSError: continue
+						state.append((join(root, name), st.st_size, st.st_mtime))
+				continue
+			try: st = os.stat(path)
+			except OSError: st = None
+			state.append((path, st.st_size, st.st_mtime, st.st_ino) if st and st.st_size else None)
+		return state
+
+	def inotify_init(self):
+		import ctypes, ctypes.util
+		self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+		self.fd, self.wd_keys, self.wd_paths = self.libc.inotify_init(), dict(), dict()
+		if self.fd < 0: raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+		for path, key in self.paths.viewitems():
+			if not isdir(path): self.inotify_add(dirname(abspath(path)), key, basename(path))
+			else:
+				for root, dirs, files in os.walk(path): self.inotify_add(root, key)
+
+	def inotify_add(self, path, key, name=None):
+		'Adds watch for path dir, with events for "name" (or any name, if None) there mapped to key.'
+		import ctypes
+		wd = self.libc.inotify_add_watch(self.fd, force_bytes(path), self.inotify_mask)
+		if wd < 0:
+			err = ctypes.get_errno()
+			raise OSError(err, os.strerror(err), path)
+		self.wd_keys.setdefault(wd, dict())[name] = key
+		self.wd_paths[wd] = path
+
+	def read(self, timeout=None):
+		'''Returns set of keys for paths that might have changed, waiting up to timeout seconds.
+			Empty set is only returned when timeout expires.'''
+		if self.fd is None:
+			while True:
+				time.sleep(min(timeout, self.poll_interval) if timeout is not None else self.poll_interval)
+				state = dict((key, self.state_get(key)) for key in self.state)
+				keys = set(key for key in state if state[key] != self.poll_state[key])
+				self.poll_state = state
+				if keys or timeout is not None: return keys
+		import select
+		deadline = timeout is not None and time.time() + timeout
+		while True: # events for unrelated files in same dirs are skipped until timeout
+			if deadline: timeout = max(0, deadline - time.time())
+			if not select.select([self.fd], [], [], timeout)[0]: return set()
+			buff, keys = os.read(self.fd, 2**16), set()
+			while buff:
+				wd, mask, cookie, name_len = self.inotify_event.unpack_from(buff)
+				name = buff[self.inotify_event.size:self.inotify_event.size + name_len].rstrip('\0')
+				buff = buff[self.inotify_event.size + name_len:]
+				if mask & self.inotify_overflow: keys.update(self.state)
+				names = self.wd_keys.get(wd, dict())
+				if None in names:
+					keys.add(names[None])
+					if mask & self.inotify_isdir and mask & (0x80 | 0x100): # new subdir
+						self.inotify_add(join(self.wd_paths[wd], name), names[None])
+				elif name in names: keys.add(names[name])
+			if keys: return keys
+
+	def __iter__(self):
+		keys, ts = set(), None
+		while True:
+			keys_new = self.read(self.delay if keys else None)
+			if keys_new:
+				keys.update(keys_new)
+				if ts is None: ts = time.time()
+				if time.time() - ts < self.delay * 10: continue
+			if not keys: continue
+			changes = set()
+			for key in keys:
+				state = self.state_get(key)
+				if state == self.state[key]: continue
+				self.state[key] = state
+				changes.add(key)
+			keys, ts = set(), None
+			if changes: yield changes
+
+
+def sources_loaders(opts, profile_dir=None):
+	'''Returns {name: (func, args) or None} loaders for Sources from command-line options,
+		without ones for profile-specific sources (bookmarks, places), unless profile_dir is specified.'''
+	loaders = dict(
+		links=opts.links and (links_get, [opts.links]),
+		notes=opts.notes and (notes_get, [opts.notes]),
+		backlog=opts.backlog and ( backlog_load,
+			[opts.backlog, opts.backlog_pick, opts.cache_dir or None, opts.backlog_recent] ) )
+	if profile_dir:
+		loaders.update(
+			bookmarks=( bookmarks_load, [ join(profile_dir, 'places.sqlite'),
+				opts.db_lock_timeout, opts.db_snapshot, opts.favicons,
+				opts.cache_dir or None, opts.full_sync ] ),
+			places=opts.places > 0 and ( places_get, [ join(profile_dir, 'places.sqlite'),
+				opts.db_lock_timeout, opts.db_snapshot, opts.places,
+				opts.places_days, opts.places_per_host, opts.places_order ] ) )
+	return loaders
+
+json_output_sources = dict(tags='bookmarks', favicons='bookmarks') # {json_name: source_name}, if different
+
+def json_outputs(opts, sources):
+	'''Returns {name: (data_func, dump_func)} for "<name>.json" outputs,
+		where data_func returns data for dump_func from Sources, as soon as it's loaded.'''
+	return dict(
+		tags=(lambda: sources.get('bookmarks')[0], ft.partial( dump_tags,
+			layout_sizes=opts.tag_cloud_layout, layout_font=opts.tag_cloud_font,
+			cache_dir=opts.cache_dir or None, edges_prune=dict(
+				top=opts.tag_edges_top, min_count=opts.tag_edges_min, score=opts.tag_edges_score,
+				threshold=opts.tag_edges_threshold, max_edges=opts.tag_edges_max ) )),
+		backlog=(lambda: sources.get('backlog') or set(), dump_backlog),
+		links=(lambda: sources.get('links') or list(), dump_links),
+		places=(lambda: sources.get('places') or list(), dump_places),
+		notes=(lambda: sources.get('notes'), dump_notes),
+		favicons=(lambda: sources.get('bookmarks')[1], dump_favicons) )
+
+def input_paths(opts, profile_dir):
+	'Returns {path: source_name} for all input files/dirs, with "parts" for --parts-path.'
+	paths = dict( (join(profile_dir, name), 'bookmarks')
+		for name in ['places.sqlite', 'places.sqlite-wal']
+			+ (['favicons.sqlite', 'favicons.sqlite-wal'] if opts.favicons else list()) )
+	for name in 'links', 'notes', 'backlog':
+		if getattr(opts, name): paths[getattr(opts, name)] = name
+	paths[opts.parts_path] = 'parts'
+	return paths
+
+def generate(opts, loaders, results, changed=None, output_path=None, parts=None, jobs=None):
+	'''Writes all outputs to output_path (default: opts.output_path),
+			or only ones that depend on "changed" sources/parts, reloading only those sources.
+		Loaded sources are stored in "results" dict, and only missing ones get loaded.
+		"parts" can be a pre-built fat_html_template or parts_build result
+			for "fat"/"lean" or "dir" formats, to only build these once for many outputs.'''
+	output_path = output_path or opts.output_path
+	for name in changed or list(): results.pop(name, None)
+	with Sources(loaders, jobs=opts.jobs if jobs is None else jobs, results=results) as sources:
+		json_dumps, json_sources = json_outputs(opts, sources), json_output_sources
+		def json_dump(k, dst):
+			data_func, dump_func = json_dumps[k]
+			data = data_func()
+			with stats.stage('dump_{}'.format(k)) as info:
+				pos = dst.tell()
+				dump_func(data, dst)
+				info['bytes'] = dst.tell() - pos
+
+		if opts.output_format in ['fat', 'lean']:
+			dst = output_path
+			if isdir(output_path): dst = join(dst, 'index.html')
+			with stats.stage('{}_html'.format(opts.output_format)) as info, dump_tempfile(dst) as dst:
+				dump_fat_html( opts.parts_path, dst,
+					dict((k, ft.partial(json_dump, k)) for k in json_dumps),
+					cache_dir=opts.cache_dir or None,
+					assets_path=opts.output_format == 'lean' and opts.assets_dir,
+					minify=opts.minify, chunks=parts )
+				info['bytes'] = dst.tell()
+		elif opts.output_format.startswith('dir'):
+			link_kws = dict((w, w in opts.output_format) for w in ['symlink', 'hardlink'])
+			manifest = OutputManifest(output_path)
+			parts_changed = changed is None or 'parts' in changed
+			if parts_changed and not any(link_kws.values()):
+				with stats.stage('build_parts'):
+					dump_parts(parts or parts_build(
+						opts.parts_path, opts.minify, opts.cache_dir or None ), manifest)
+			elif parts_changed:
+				with stats.stage('copy_parts'):
+					copy_parts(opts.parts_path, output_path, manifest=manifest, **link_kws)
+			json_dumps['favicons'] = json_dumps['favicons'][0],\
+				ft.partial(dump_favicons, files_path=output_path)
+			for name in sources: # in the order these get loaded
+				for k in sorted(json_dumps):
+					if json_sources.get(k, k) != name: continue
+					dst_name, gz = '{}.json'.format(k), not any(link_kws.values())
+					if changed is not None and name not in changed:
+						manifest.seen.update([dst_name, dst_name + '.gz'] if gz else [dst_name])
+						continue
+					with manifest.dump(dst_name, gz=gz) as dst: json_dump(k, dst)
+			if parts_changed: manifest.cleanup()
+			manifest.save()
+		else: raise NotImplementedError
+	results.update(sources.results)
+
+def output_url(path, output_format):
+	path = abspath(path)
+	if output_format not in ['fat', 'lean'] or isdir(path): path = join(path, 'index.html')
+	return 'file://{}'.format(urllib.quote(path))
+
+
+batch_output_vars = re.compile(r'\{(profile|dir)\}')
+
+def batch_output_path(template, profile):
+	'''Returns output path for (name, profile_dir) tuple from --output-path template,
+		with only "{profile}" and "{dir}" placeholders replaced, and any other braces left as-is.'''
+	name, profile_dir = profile
+	return batch_output_vars.sub(
+		lambda m: name if m.group(1) == 'profile' else basename(profile_dir), template )
+
+batch_state = None # (opts, results, parts) tuple, set by batch_init in worker processes
+
+def batch_init(*state):
+	global batch_state
+	batch_state = state
+
+def batch_generate(profile):
+	'''Generates outputs for (name, profile_dir) tuple in a process set up by batch_init.
+		Returns (name, output_path, stages) tuple, with stats stages or None, if it failed.'''
+	global stats
+	(name, profile_dir), (opts, results, parts) = profile, batch_state
+	output_path = batch_output_path(opts.output_path, profile)
+	stats_main, stats = stats, Stats()
+	try:
+		with stats.stage('generate'):
+			generate( opts, sources_loaders(opts, profile_dir), dict(results),
+				output_path=output_path, parts=parts, jobs=1 ) # pool workers can't start their own
+	except Exception as err:
+		log.exception('Failed to generate outputs for profile %r (%s): %s', name, profile_dir, err)
+		return name, output_path, None
+	finally: stats_main, stats = stats, stats_main
+	return name, output_path, stats_main.stages
+
+class ServeEntity(namedtuple('ServeEntity', 'data data_gz etag mime cache')):
+	'''Response body for --serve mode, with gzip-compressed copy (or None) and strong ETag value.
+		"cache" is a Cache-Control header value.'''
+
+	@classmethod
+	def build(cls, name, data, cache='no-cache'):
+		mime = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+		if name.endswith('.json'): mime = 'application/javascript' # "var=...;" files
+		data_gz = None
+		if mime.startswith('text/') or mime == 'application/javascript':
+			mime += '; charset=utf-8'
+			with closing(io.BytesIO()) as buff:
+				with closing(gzip.GzipFile('', 'wb', 6, buff, mtime=0)) as dst: dst.write(data)
+				data_gz = buff.getvalue()
+		return cls(data, data_gz, hashlib.sha256(data).hexdigest()[:16], mime, cache)
+
+class ServeRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+	server_version = 'ffhomegen'
+
+	def do_GET(self, head=False):
+		name = urllib.unquote(self.path.split('?', 1)[0]).lstrip('/') or 'index.html'
+		try: entity = self.server.get(name)
+		except Exception as err:
+			log.exception('Failed to build response for %r: %s', self.path, err)
+			return self.send_error(500)
+		if not entity: return self.send_error(404)
+		data, etag = entity.data, entity.etag
+		gz = entity.data_gz and 'gzip' in self.headers.get('Accept-Encoding', '')
+		if gz: data, etag = entity.data_gz, etag + '-gz'
+		etag = '"{}"'.format(etag)
+		not_modified = etag in self.headers.get('If-None-Match', '')
+		self.send_response(304 if not_modified else 200)
+		self.send_header('ETag', etag)
+		self.send_header('Cache-Control', entity.cache)
+		if entity.data_gz: self.send_header('Vary', 'Accept-Encoding')
+		if not not_modified:
+			self.send_header('Content-Type', entity.mime)
+			self.send_header('Content-Length', len(data))
+			if gz: self.send_header('Content-Encoding', 'gzip')
+		self.end_headers()
+		if not (head or not_modified): self.wfile.write(data)
+
+	def do_HEAD(self): self.do_GET(head=True)
+
+	def log_message(self, fmt, *args):
+		log.debug('http %s - %s', self.address_string(), fmt % args)
+
+class HomepageServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+	'''HTTP server for --serve mode, with the page and all data for it kept in memory.
+		Content is only rebuilt on requests, if any of the input files changed (by size/mtime)
+			since the last build, with only one rebuild at a time, which other requests wait for.
+		With random --backlog-pick, backlog links are re-picked for every backlog.json request,
+			from BacklogIndex (or list of links) kept between these, and "recent" keys stored in memory.'''
+
+	daemon_threads = allow_reuse_address = True
+
+	def __init__(self, addr, opts, loaders, inputs):
+		BaseHTTPServer.HTTPServer.__init__(self, addr, ServeRequestHandler)
+		self.opts, self.inputs, self.lock = opts, inputs, threading.Lock()
+		self.backlog_pick = opts.backlog and opts.backlog_pick != 'all'
+		self.loaders = dict(loaders, backlog=None) if self.backlog_pick else loaders
+		self.results, self.content, self.inputs_state = dict(), dict(), None
+		self.backlog, self.backlog_recent = None, list()
+
+	def get_inputs_state(self):
+		'Returns {source_name: [(path, size, mtime), ...]} for all input files, including ones in dirs.'
+		state = defaultdict(list)
+		for path, name in self.inputs.viewitems():
+			paths = [path] if not isdir(path) else sorted(
+				join(root, f) for root, dirs, files in os.walk(path) for f in files )
+			for p in paths:
+				try: st = os.stat(p)
+				except OSError: state[name].append((p, None, None))
+				else: state[name].append((p, st.st_size, st.st_mtime))
+		return state
+
+	def update(self):
+		state = self.get_inputs_state()
+		if state == self.inputs_state: return
+		with self.lock:
+			if state == self.inputs_state: return # updated by other thread
+			changed = None if self.inputs_state is None else set( name
+				for name in set(state).union(self.inputs_state)
+				if state.get(name) != self.inputs_state.get(name) )
+			if changed and 'bookmarks' in changed: changed.add('places') # same db
+			log.debug( 'Updating served content for changes in: %s',
+				', '.join(sorted(changed)) if changed else 'all' )
+			global stats
+			stats = Stats()
+			self.content = self.build(changed)
+			self.inputs_state = state
+			if self.opts.stats:
+				with dump_tempfile(self.opts.stats) as dst: stats.dump(dst)
+
+	def build(self, changed=None):
+		'Returns new content dict, with parts that depend on "changed" sources (or all) rebuilt.'
+		opts, content = self.opts, dict(self.content)
+		if changed is None or 'parts' in changed:
+			with stats.stage('parts_build'):
+				html, assets = parts_build(opts.parts_path, opts.minify, opts.cache_dir or None)
+			for name in list(content):
+				if not name.endswith('.json'): del content[name]
+			content['index.html'] = ServeEntity.build('index.html', html)
+			for name, data in assets.viewitems(): # content-versioned names
+				content[name] = ServeEntity.build(name, data, 'max-age=31536000, immutable')
+		if self.backlog_pick and (changed is None or 'backlog' in changed):
+			with stats.stage('load_backlog'):
+				backlog = backlog_get(opts.backlog, opts.cache_dir or None)
+				backlog, self.backlog = self.backlog,\
+					backlog if isinstance(backlog, BacklogIndex) else list(backlog)
+				if isinstance(backlog, BacklogIndex): backlog.close() # backlog_json uses same lock
+		for name in changed or list(): self.results.pop(name, None)
+		# Worker processes are not forked from server threads here
+		with Sources(self.loaders, jobs=1, results=self.results) as sources:
+			for k, (data_func, dump_func) in json_outputs(opts, sources).viewitems():
+				if changed is not None and json_output_sources.get(k, k) not in changed: continue
+				if k == 'backlog' and self.backlog_pick: continue
+				data = data_func()
+				with stats.stage('dump_{}'.format(k)) as info, closing(io.BytesIO()) as dst:
+					dump_func(data, dst)
+					info['bytes'] = dst.tell()
+					content['{}.json'.format(k)] = ServeEntity.build('{}.json'.format(k), dst.getvalue())
+		self.results.update(sources.results)
+		return content
+
+	def backlog_json(self):
+		'''Returns backlog.json entity with links randomly picked from backlog, not stored anywhere.
+			Links are picked under same lock as rebuilds, which can replace (and close) backlog index.'''
+		with self.lock:
+			backlog = backlog_process(self.backlog, self.opts.backlog_pick, set(self.backlog_recent))
+			if self.opts.backlog_recent:
+				picked = map(backlog_link_key, backlog)
+				self.backlog_recent = ( list( k for k in self.backlog_recent
+					if k not in picked ) + picked )[-self.opts.backlog_recent:]
+		with closing(io.BytesIO()) as dst:
+			dump_backlog(backlog, dst)
+			return ServeEntity.build('backlog.json', dst.getvalue(), 'no-store')
+
+	def get(self, name):
+		self.update()
+		if name == 'backlog.json' and self.backlog_pick: return self.backlog_json()
+		return self.content.get(name)
 
 
 def main(args=None):
@@ -449,14 +1967,42 @@ def main(args=None):
 			' "fat" will generate a single html file in --output-path, with all js/css assets embedded.'
 			' "dir" options will create directory at --output-path,'
 				' generate index.html there and copy/link all the necessary assets to it.'
-			' "lean" will generate single html file (like "fat"),'
-				' but will embed only stuff that cant be linked from the web (e.g. d3 from d3js.org).')
+			' Plain "dir" only writes files linked from index.html, minified (unless --no-minify is used)'
+				' and under content-versioned names, with gzip-compressed .gz copies of text files,'
+				' so that these can be served by any http server with long-term caching,'
+				' while "dir-symlinks" and "dir-hardlinks" link all --parts-path files as-is.'
+			' "lean" will generate single html file (like "fat"), but with only generated data embedded,'
+				' linking js/css/img files from the --assets-dir via file:// URLs,'
+				' so that these can be cached by the browser, and are not re-written on every run.')
+	parser.add_argument('-a', '--assets-dir', metavar='dir',
+		help='Directory to store static js/css/img files for "lean" --output-format in.'
+			' Files are stored under content-versioned names and never modified,'
+				' so same dir can be shared between any number of pages and runs.'
+			' Default is "assets" dir in --cache-dir, or next to output html, if caching is disabled.')
+	parser.add_argument('--no-minify', dest='minify', action='store_false',
+		help='Do not strip whitespace and comments from js/css files'
+				' for "fat", "lean" and "dir" --output-format.'
+			' Minified files are cached in --cache-dir by hash of their source.')
 
 	parser.add_argument('-p', '--parts-path',
 		metavar='dir', default=join(dirname(__file__), 'parts'),
 		help='Path to directory with html, js and css files (default: %(default)s).'
 			' JSON files with data will be generated there, to be loaded (or embedded) into html.')
 
+	parser.add_argument('-c', '--cache-dir', metavar='dir',
+		default=join(os.environ.get('XDG_CACHE_HOME') or expanduser('~/.cache'), 'ffhomegen'),
+		help='Directory to store data that is expensive to build and rarely changes,'
+			' e.g. compiled "fat" html template with all the assets embedded.'
+			' Bookmarks are also stored there between runs, to only query changes to these from db,'
+				' but note that changes to bookmarked pages without new visits to them'
+				' (e.g. titles, firefox re-calculating frecency) are only picked-up by periodic'
+				' full re-sync (once per {}h), or when --full-sync option is used.'
+			' Use empty string to disable caching entirely (default: %(default)s).'.format(
+				BookmarksState.max_age // 3600 ))
+	parser.add_argument('--full-sync', action='store_true',
+		help='Query all bookmarks from db, instead of only ones changed since'
+			' the last run (see --cache-dir), and store these for subsequent runs.')
+
 	parser.add_argument('-l', '--links', metavar='path',
 		help='Path to a file with links (one per line) to display on the page.'
 			' Aside from link, lines can have title for these in pretty much any format.'
@@ -470,20 +2016,117 @@ def main(args=None):
 				' obviously-tied string element will be considered to be a title for that link.')
 	parser.add_argument('-x', '--backlog-pick', metavar='spec', default='random-30',
 		help='How to pick/represent which backlog links to display.'
-			' Supported choices: random-<num>, all (default: %(default)s).')
+			' Supported choices: random-<num>, all (default: %(default)s).'
+			' Links are picked from the index, built in --cache-dir on first run'
+				' and when backlog file changes, so that it does not have to be parsed every time.')
+	parser.add_argument('--backlog-recent', metavar='n', type=int, default=0,
+		help='Remember keys of specified number of last picked random backlog links'
+				' in --cache-dir and avoid picking these again, unless there are not enough other ones.'
+			' Default is to pick links at random on every run.')
+	parser.add_argument('-i', '--favicons', action='store_true',
+		help='Fetch bookmark favicons from places.sqlite (or favicons.sqlite) and show them in tag links.'
+			' Icons are deduplicated by contents and stored only once -'
+				' in a shared table for "fat" output, or as content-hashed files in "favicons"'
+				' subdir for "dir" outputs. Not fetched from db at all, unless this option is used.')
 	parser.add_argument('-n', '--notes', metavar='path',
 		help='Path to any text file to include as "Notes" at the bottom of the page.'
 			' Useful for rarely-modified reminder/reference stuff, e.g. tricks, hotkeys, commands.')
+	parser.add_argument('-r', '--places', metavar='n', type=int, default=0,
+		help='Show specified number of top visited pages from firefox history in "Top Places" section.'
+			' Ranking, time window and per-host grouping are done by sqlite queries,'
+				' so only that many rows are fetched from history. Disabled by default.')
+	parser.add_argument('--places-days', metavar='n', type=int, default=30,
+		help='Only count visits made during specified number of last days'
+			' for --places, or use all-time visit counts from moz_places, if 0 (default: %(default)s).')
+	parser.add_argument('--places-per-host', metavar='n', type=int, default=3,
+		help='Max number of --places pages from the same host, 0 - no limit (default: %(default)s).')
+	parser.add_argument('--places-order', metavar='key',
+		default='visits', choices=['visits', 'frecency'],
+		help='How to rank --places pages. Possible choices: visits, frecency (default: %(default)s).'
+			' "frecency" is the firefox-calculated score used for url bar suggestions,'
+				' only pages visited during --places-days are ranked by it.')
+
+	parser.add_argument('-L', '--tag-cloud-layout', metavar='WxH[,WxH...]',
+		help='Compute tag cloud layout for each of the specified (comma-separated) sizes'
+				' of tag cloud box in px on the page (e.g. "1000x604") during generation,'
+				' so that page can be displayed immediately, running client-side layout only on shuffle.'
+			' Page picks the layout for size closest to its actual one, and scales it to fit there.'
+			' Layouts are cached in --cache-dir for same tags, their font sizes (in px) and box size.')
+	parser.add_argument('--tag-cloud-font', metavar='px', type=int, default=16,
+		help='Base font size of tag cloud box on the page (in px),'
+			' to compute --tag-cloud-layout for (default: %(default)s).'
+			' Page will only use precomputed layouts for the font size it has.')
+	parser.add_argument('--tag-edges-top', metavar='n', type=int, default=20,
+		help='Only keep n best-scoring (see --tag-edges-score) co-occurrence edges for each tag'
+				' (unless these are among best ones for the other tag), 0 - no limit (default: %(default)s).'
+			' Co-occurrence of the highlighted tag with others is shown in the tag cloud,'
+				' and full graph of these can be very large for heavily-tagged bookmarks.')
+	parser.add_argument('--tag-edges-min', metavar='n', type=int, default=1,
+		help='Min number of bookmarks that two tags must have in common'
+			' to have a co-occurrence edge (default: %(default)s).')
+	parser.add_argument('--tag-edges-score', metavar='func',
+		default='count', choices=['count', 'pmi', 'jaccard'],
+		help='How to score tag co-occurrence edges for --tag-edges-top/--tag-edges-max/--tag-edges-threshold.'
+			' Possible choices: count, pmi, jaccard (default: %(default)s).'
+			' "count" is a number of bookmarks with both tags,'
+				' "pmi" - log of how much more often tags occur together than they would by chance,'
+				' "jaccard" - ratio of bookmarks with both tags to ones with any of them.')
+	parser.add_argument('--tag-edges-threshold', metavar='score', type=float,
+		help='Drop tag co-occurrence edges with lower --tag-edges-score than that (default: none).')
+	parser.add_argument('--tag-edges-max', metavar='n', type=int, default=10000,
+		help='Max total number of best-scoring tag co-occurrence edges'
+			' to keep after all other filtering, 0 - no limit (default: %(default)s).')
 
 	parser.add_argument('-P', '--profile', metavar='name/key/path',
 		help='Full firefox profile name, profile directory name'
 			' or its fragment, or a full path to profile dir (default: use default profile).')
+	parser.add_argument('-B', '--batch', nargs='*', metavar='name/key/path',
+		help='Generate outputs for each of the specified firefox profiles (same as for --profile),'
+				' or for all profiles in profiles.ini, if none are specified, in --jobs worker processes.'
+			' Links, backlog, notes and html/assets are only loaded and built once for all of them.'
+			' --output-path is used as a template for each profile, where "{profile}" gets replaced'
+				' by profile name and "{dir}" by its directory name (default: "output-{profile}" dir or .html).'
+			' Cannot be used with --watch.')
 	parser.add_argument('-t', '--db-lock-timeout',
 		type=float, metavar='seconds', default=30,
 		help='Timeout to acquire sqlite transaction locks (default: %(default)ss).')
-
-	parser.add_argument('-v', '--print-html-url',
-		action='store_true', help='Print file:// URL to produced html to stdout on exit.')
+	parser.add_argument('-s', '--db-snapshot', action='store_true',
+		help='Read data from a temporary copy of places.sqlite (and its wal/journal files),'
+			' made with consistency checks, instead of the db itself.'
+			' Allows to never wait on db locks held by running firefox (or block it),'
+				' at the cost of copying the whole db on every run.')
+
+	parser.add_argument('-j', '--jobs', type=int, metavar='n',
+		help='Number of worker processes to load data sources'
+				' (bookmarks, places, links, backlog, notes) in parallel with,'
+				' or to generate outputs for each profile with in --batch mode.'
+			' Default is to use one process per source, up to the number of cpus.'
+			' 0 or 1 - load all of them sequentially in the main process,'
+				' only when each one is needed.')
+
+	parser.add_argument('-w', '--watch', action='store_true',
+		help='Keep running after generating outputs, watching profile databases,'
+				' --links, --backlog and --notes files and --parts-path for changes'
+				' (via inotify on linux, or by polling otherwise), and only re-loading/updating'
+				' affected sources/outputs when these happen, keeping all other data in memory.'
+			' Note that random backlog links are only re-picked when backlog file changes.')
+	parser.add_argument('--watch-delay', type=float, metavar='seconds', default=0.5,
+		help='Delay after last detected change in --watch mode'
+			' before updating outputs, to handle bursts of changes at once (default: %(default)ss).')
+	parser.add_argument('--serve', metavar='[host:]port',
+		help='Run http server on specified port (and host, 127.0.0.1 by default) instead of writing'
+				' any outputs, with html page, static assets (as with "dir" --output-format)'
+				' and all generated data for it kept in memory, and served with ETag/gzip.'
+			' Content is only rebuilt on requests after any of the input files'
+				' (profile db, --links, --backlog, --notes, --parts-path) change, like in --watch mode,'
+				' and random backlog links get re-picked for every page load, without writing anything.'
+			' Cannot be used with --batch or --watch.')
+	parser.add_argument('-v', '--print-html-url', action='store_true',
+		help='Print file:// URL to produced html to stdout on exit, or http:// one for --serve on start.')
+	parser.add_argument('-S', '--stats', metavar='path',
+		help='Write json with wall/cpu time spent on each stage of the run'
+			' (profile lookup, loading each source, each json dump, assets copying, html assembly),'
+			' along with row/query counts, bytes written and peak RSS, to a specified file.')
 	parser.add_argument('-d', '--debug', action='store_true', help='Verbose operation mode.')
 	opts = parser.parse_args(sys.argv[1:] if args is None else args)
 
@@ -492,9 +2135,31 @@ def main(args=None):
 	logging.basicConfig(level=logging.DEBUG if opts.debug else logging.WARNING)
 	log = logging.getLogger()
 
+	layout_sizes = list()
+	for size in filter(None, (opts.tag_cloud_layout or '').split(',')):
+		try: layout_sizes.append(tuple(map(int, size.strip().lower().split('x', 1))))
+		except ValueError: layout_sizes = None
+		if not layout_sizes or len(layout_sizes[-1]) != 2 or min(layout_sizes[-1]) <= 100:
+			parser.error('Invalid --tag-cloud-layout size (must be WxH, over 100px): {!r}'.format(size))
+	opts.tag_cloud_layout = layout_sizes
+
+	if opts.batch is not None and opts.watch:
+		parser.error('--batch and --watch options cannot be used together.')
+	if opts.serve:
+		if opts.batch is not None or opts.watch:
+			parser.error('--serve option cannot be used with --batch or --watch.')
+		host, port = opts.serve.rsplit(':', 1) if ':' in opts.serve else ('127.0.0.1', opts.serve)
+		try: opts.serve = host.strip('[]'), int(port)
+		except ValueError: parser.error('Invalid --serve port: {!r}'.format(port))
 	if not opts.output_path:
 		opts.output_path = join(dirname(__file__), 'output')
-		if opts.output_format == 'fat': opts.output_path += '.html'
+		if opts.batch is not None: opts.output_path += '-{profile}'
+		if opts.output_format in ['fat', 'lean']: opts.output_path += '.html'
+	if not opts.assets_dir:
+		path = opts.output_path
+		if opts.batch is not None: path = batch_output_vars.split(path, 1)[0] # dir with all outputs
+		opts.assets_dir = join( opts.cache_dir
+			or (path if isdir(path) else dirname(abspath(path))), 'assets' )
 
 	if opts.debug:
 		global pyaml, dump
@@ -512,43 +2177,88 @@ def main(args=None):
 				Link, lambda s,o: s.represent_dict(o._asdict()) )
 		dump = ft.partial(pyaml.dump, dst=sys.stdout, force_embed=True)
 
-	profile_dir = get_profile_dir(opts.profile)
+	global stats
+	stats = Stats()
+
+	if opts.batch is not None:
+		with stats.stage('profile_lookup'):
+			profiles = get_profile_dirs(opts.batch)
+		paths = set(batch_output_path(opts.output_path, profile) for profile in profiles)
+		if len(paths) != len(profiles):
+			parser.error( 'Same --output-path for multiple --batch profiles,'
+				' it must include "{{profile}}" or "{{dir}}" placeholder: {!r}'.format(opts.output_path) )
+		with Sources(sources_loaders(opts), jobs=opts.jobs) as sources:
+			results = dict((name, sources.get(name)) for name in sources)
+		parts = None
+		if opts.output_format in ['fat', 'lean']:
+			with stats.stage('fat_html_template'):
+				parts = fat_html_template( opts.parts_path, opts.cache_dir or None,
+					opts.output_format == 'lean' and opts.assets_dir, opts.minify )
+		elif opts.output_format == 'dir':
+			with stats.stage('parts_build'):
+				parts = parts_build(opts.parts_path, opts.minify, opts.cache_dir or None)
+
+		jobs = min(multiprocessing.cpu_count() if opts.jobs is None else opts.jobs, len(profiles))
+		pool = jobs > 1 and multiprocessing.Pool(jobs, batch_init, (opts, results, parts))
+		if pool:
+			pending = pool.imap_unordered(batch_generate, profiles)
+			pool.close()
+		else:
+			batch_init(opts, results, parts)
+			pending = it.imap(batch_generate, profiles)
+		failed = 0
+		try:
+			for name, output_path, stages in pending:
+				if stages is None:
+					failed += 1
+					continue
+				for k, info in stages.viewitems(): stats.stages['{}/{}'.format(name, k)] = info
+				if opts.print_html_url:
+					print(output_url(output_path, opts.output_format))
+					sys.stdout.flush()
+		finally:
+			if pool: pool.terminate() if sys.exc_info()[0] else pool.join()
+		if opts.stats:
+			with dump_tempfile(opts.stats) as dst: stats.dump(dst)
+		return 1 if failed else 0
+
+	with stats.stage('profile_lookup'):
+		profile_dir = get_profile_dir(opts.profile)
 	log.debug('Using ff profile dir: %s', profile_dir)
 
-	bookmarks = bookmarks_get(join(profile_dir, 'places.sqlite'), timeout=opts.db_lock_timeout)
-	links = links_get(opts.links) if opts.links else list()
-	notes = notes_get(opts.notes) if opts.notes else None
-	if opts.backlog:
-		backlog = backlog_get(opts.backlog)
-		backlog = backlog_process(backlog, opts.backlog_pick)
-	else: backlog = set()
-
-	# XXX: get_places()
-
-
-	## Install
-	json_dumps = dict(
-		tags=ft.partial(dump_tags, bookmarks),
-		backlog=ft.partial(dump_backlog, backlog),
-		links=ft.partial(dump_links, links),
-		notes=ft.partial(dump_notes, notes) )
-	if opts.output_format == 'fat':
-		dst = opts.output_path
-		if isdir(opts.output_path): dst = join(dst, 'index.html')
-		with dump_tempfile(dst) as dst:
-			dump_fat_html(opts.parts_path, dst, json_dumps)
-	elif opts.output_format.startswith('dir'):
-		link_kws = dict((w, w in opts.output_format) for w in ['symlink', 'hardlink'])
-		copy_parts(opts.parts_path, opts.output_path, **link_kws)
-		for k, dump_func in json_dumps.viewitems():
-			with dump_tempfile(join(
-				opts.output_path, '{}.json'.format(k) )) as dst: dump_func(dst)
-	else: raise NotImplementedError
+	loaders = sources_loaders(opts, profile_dir)
+
+	if opts.serve:
+		server = HomepageServer(opts.serve, opts, loaders, input_paths(opts, profile_dir))
+		if opts.print_html_url:
+			print('http://{}:{}/'.format(*server.server_address[:2]))
+			sys.stdout.flush()
+		try: server.serve_forever()
+		except KeyboardInterrupt: pass
+		finally: server.server_close()
+		return
+
+	results = dict() # kept between runs in --watch mode
+
+	def run_generate(changed=None):
+		generate(opts, loaders, results, changed)
+		if opts.stats:
+			with dump_tempfile(opts.stats) as dst: stats.dump(dst)
+
+	run_generate()
 
 	if opts.print_html_url:
-		import urllib
-		path = urllib.quote(join(abspath(opts.output_path), 'index.html'))
-		print('file://{}'.format(path))
+		print(output_url(opts.output_path, opts.output_format))
+		sys.stdout.flush()
+
+	if opts.watch:
+		for changed in FileWatcher(input_paths(opts, profile_dir), delay=opts.watch_delay):
+			if 'bookmarks' in changed: changed.add('places') # same db
+			log.debug('Updating outputs for changes in: %s', ', '.join(sorted(changed)))
+			stats = Stats()
+			try: run_generate(changed)
+			except Exception as err:
+				log.exception('Failed to update outputs, will retry on next change: %s', err)
 
 
 if __name__ == '__main__': sys.exit(main())
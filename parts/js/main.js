@@ -1,8 +1,7 @@
 // Generated by CoffeeScript 1.11.1
 (function() {
   'use strict';
-  var assert, backlog, cloud, data, draw, draw_hl_fade, draw_hl_fade_vis, draw_status, focus, links, notes, ref, sha256_bytes, tag, tags, tags_slist, throw_err, tiered_scale_for, vis,
-    hasProp = {}.hasOwnProperty;
+  var assert, backlog, cloud, data, draw, draw_hl_fade, draw_hl_fade_vis, draw_status, focus, links, notes, places, ref, tags, tags_slist, throw_err, tiered_scale_for, vis;
 
   throw_err = function(msg) {
     throw new Error(msg || 'Unspecified Error');
@@ -14,27 +13,6 @@
     }
   };
 
-  sha256_bytes = function(str, count) {
-    var c, hash, j, n, ref, res;
-    if (count == null) {
-      count = 1;
-    }
-    assert((typeof sjcl !== "undefined" && sjcl !== null ? sjcl.hash.sha256 : void 0) && count <= 4 * 8);
-    ref = [[], sjcl.hash.sha256.hash(str)], res = ref[0], hash = ref[1];
-    while (hash) {
-      c = hash.pop();
-      for (n = j = 0; j <= 3; n = ++j) {
-        res.push(c & 0xff);
-        count -= 1;
-        if (count <= 0) {
-          return res;
-        }
-        c >>>= 8;
-      }
-    }
-    return assert(false);
-  };
-
   tiered_scale_for = function(scale_ranges, order, domain) {
     var a, b, scale;
     if (typeof domain === 'object') {
@@ -57,84 +35,23 @@
     }
   };
 
-  for (tag in ffhome_tags) {
-    if (!hasProp.call(ffhome_tags, tag)) continue;
-    data = ffhome_tags[tag];
-    data.tag = tag;
-    data.links.sort(function(a, b) {
-      return b.frecency - a.frecency;
-    });
-  }
-
   tags = {
-    indexed: ffhome_tags,
-    sorted: ((function() {
-      var results;
-      results = [];
-      for (tag in ffhome_tags) {
-        if (!hasProp.call(ffhome_tags, tag)) continue;
-        data = ffhome_tags[tag];
-        results.push({
-          tag: tag,
-          value: data.value,
-          links: data.links
-        });
+    indexed: (function(index) {
+      var data, j, len, ref;
+      ref = ffhome_tags.tags;
+      for (j = 0, len = ref.length; j < len; j++) {
+        data = ref[j];
+        index[data.tag] = data;
       }
-      return results;
-    })()).sort(function(a, b) {
-      return b.value - a.value;
-    }),
+      return index;
+    })({}),
+    sorted: ffhome_tags.tags,
     edges: {
-      sorted: ffhome_tag_edges.sort(function(a, b) {
-        return a[2] - b[2];
-      }),
-      indexed: (function(index) {
-        var j, l, len, len1, ref, ref1, ref2, t1, t2, v;
-        for (j = 0, len = ffhome_tag_edges.length; j < len; j++) {
-          ref = ffhome_tag_edges[j], t1 = ref[0], t2 = ref[1], v = ref[2];
-          ref1 = [[t1, t2], [t2, t1]];
-          for (l = 0, len1 = ref1.length; l < len1; l++) {
-            ref2 = ref1[l], t1 = ref2[0], t2 = ref2[1];
-            if (index[t1] == null) {
-              index[t1] = {};
-            }
-            index[t1][t2] = v;
-          }
-        }
-        return index;
-      })({})
+      indexed: ffhome_tag_edges
     },
     highlight: null,
     links: {
-      indexed: (function(index) {
-        var j, len, link, ref, url;
-        for (tag in ffhome_tags) {
-          if (!hasProp.call(ffhome_tags, tag)) continue;
-          data = ffhome_tags[tag];
-          ref = data.links;
-          for (j = 0, len = ref.length; j < len; j++) {
-            link = ref[j];
-            index[link.url] = index[link.url] || (function(link_copy) {
-              var k, v;
-              for (k in link) {
-                if (!hasProp.call(link, k)) continue;
-                v = link[k];
-                link_copy[k] = v;
-              }
-              return link_copy;
-            })({
-              tags: []
-            });
-            index[link.url].tags.push(tag);
-          }
-        }
-        for (url in index) {
-          if (!hasProp.call(index, url)) continue;
-          link = index[url];
-          link.tags.sort();
-        }
-        return index;
-      })({}),
+      list: ffhome_tags.links,
       box: d3.select('#tag-links'),
       opacity: d3.scale.linear().range([0.7, 1])
     },
@@ -143,12 +60,12 @@
       box: d3.select('#tag-list ul'),
       hidden: true,
       names: ((function() {
-        var results;
+        var j, len, ref, results;
+        ref = ffhome_tags.tags;
         results = [];
-        for (tag in ffhome_tags) {
-          if (!hasProp.call(ffhome_tags, tag)) continue;
-          data = ffhome_tags[tag];
-          results.push(tag);
+        for (j = 0, len = ref.length; j < len; j++) {
+          data = ref[j];
+          results.push(data.tag);
         }
         return results;
       })()).sort(),
@@ -170,13 +87,9 @@
       face: null,
       extent: [0.9, 3.5]
     },
-    color: (function(level) {
-      return function(str) {
-        var h, ref, s;
-        ref = sha256_bytes(str, 2), h = ref[0], s = ref[1];
-        return d3.hsl(h, s, level).toString();
-      };
-    })(0.3),
+    color: function(tag) {
+      return tags.indexed[tag].color;
+    },
     box: d3.select('#vis'),
     data: null,
     status: d3.select('#vis-status div'),
@@ -211,16 +124,18 @@
 
   assert(vis.h > 100 && vis.w > 100, vis);
 
-  vis.font.scale = vis.box.style('font-size');
+  vis.font.px = vis.box.style('font-size');
 
-  assert(vis.font.scale.match(/px$/), vis);
+  assert(vis.font.px.match(/px$/), vis);
 
-  vis.font.scale = parseInt(vis.font.scale);
+  vis.font.px = parseInt(vis.font.px);
 
-  vis.font.scale = d3.scale.linear().range([vis.font.scale * vis.font.extent[0], vis.font.scale * vis.font.extent[1]]).domain([+tags.sorted[tags.sorted.length - 1].value, +tags.sorted[0].value]);
+  vis.font.scale = d3.scale.linear().range([vis.font.px * vis.font.extent[0], vis.font.px * vis.font.extent[1]]).domain([+tags.sorted[tags.sorted.length - 1].value, +tags.sorted[0].value]);
 
   draw_hl_fade = function(selection, opts, d_filter, edges) {
+    var edge_range, ref1;
     edges = tags.edges.indexed[tags.highlight] || {};
+    edge_range = ((ref1 = tags.indexed[tags.highlight]) != null ? ref1.edge_range : void 0) || [0, 0];
     return (function(hl_tag, scale) {
       return selection.transition().duration(1000).style('opacity', function(d) {
         if (d_filter) {
@@ -234,7 +149,7 @@
         }
         return scale(edges[d]);
       });
-    })(tags.highlight, opts.scale_for(1, edges));
+    })(tags.highlight, opts.scale_for(1, edge_range));
   };
 
   draw_hl_fade_vis = function(selection) {
@@ -298,7 +213,50 @@
     return vis.font.scale(d.value);
   }).timeInterval(2e308).words(tags.sorted).text(function(d) {
     return d.tag;
-  }).on('word', draw_status).on('end', draw).start();
+  }).on('word', draw_status).on('end', draw);
+
+  vis.layout = (function(layouts) {
+    var dist;
+    if (!(layouts != null ? layouts.length : void 0)) {
+      return null;
+    }
+    dist = function(d) {
+      return Math.abs(d.size[0] - vis.w) + Math.abs(d.size[1] - vis.h);
+    };
+    return layouts.reduce(function(a, b) {
+      if (dist(b) < dist(a)) {
+        return b;
+      } else {
+        return a;
+      }
+    });
+  })(typeof ffhome_tag_layouts !== "undefined" && ffhome_tag_layouts !== null ? ffhome_tag_layouts.filter(function(d) {
+    return d.font === vis.font.px;
+  }) : void 0);
+
+  if (vis.layout) {
+    (function(dx, dy, bounds) {
+      var b;
+      if (bounds) {
+        bounds = (function() {
+          var j, len, results;
+          results = [];
+          for (j = 0, len = bounds.length; j < len; j++) {
+            b = bounds[j];
+            results.push({
+              x: b.x + dx,
+              y: b.y + dy
+            });
+          }
+          return results;
+        })();
+      }
+      vis.status.style('width', '100%');
+      return draw(vis.layout.words, bounds);
+    })((vis.w - vis.layout.size[0]) / 2, (vis.h - vis.layout.size[1]) / 2, vis.layout.bounds);
+  } else {
+    cloud.start();
+  }
 
   d3.select('#vis-shuffle').on('click', function(d) {
     tags.highlight = null;
@@ -307,10 +265,19 @@
   });
 
   focus = function(d) {
-    var data_fext, frecency_scale, opacity, text;
+    var data_fext, frecency_scale, link, n, opacity, text;
     tags.highlight = d.tag;
     draw_hl_fade_vis();
-    data = tags.indexed[tags.highlight].links;
+    data = (function() {
+      var j, len, ref1, results;
+      ref1 = tags.indexed[tags.highlight].links;
+      results = [];
+      for (j = 0, len = ref1.length; j < len; j++) {
+        n = ref1[j];
+        results.push(tags.links.list[n]);
+      }
+      return results;
+    })();
     data_fext = d3.extent(data, function(d) {
       return d.frecency;
     });
@@ -320,9 +287,17 @@
     text = tags.links.box.select('ul').selectAll('li').data(data, function(d, i) {
       return d.url;
     });
-    text.enter().append('li').append('a').attr('href', function(d) {
+    link = text.enter().append('li').append('a').attr('href', function(d) {
       return d.url;
-    }).text(function(d) {
+    });
+    link.filter(function(d) {
+      return d.favicon && (typeof ffhome_favicons !== "undefined" && ffhome_favicons !== null ? ffhome_favicons[d.favicon] : void 0);
+    }).append('img').classed({
+      favicon: true
+    }).attr('src', function(d) {
+      return ffhome_favicons[d.favicon];
+    });
+    link.append('span').text(function(d) {
       return d.title || d.url;
     });
     text.exit().remove();
@@ -331,7 +306,16 @@
     }).order().attr('title', function(d) {
       var frec_percent, tag_list;
       frec_percent = Math.round(frecency_scale(d.frecency), 0);
-      tag_list = tags.links.indexed[d.url].tags.join(', ');
+      tag_list = ((function() {
+        var j, len, ref1, results;
+        ref1 = d.tags;
+        results = [];
+        for (j = 0, len = ref1.length; j < len; j++) {
+          n = ref1[j];
+          results.push(tags.sorted[n].tag);
+        }
+        return results;
+      })()).join(', ');
       return "frecency index: " + d.frecency + " (" + frec_percent + "% linear)\ntags: " + tag_list;
     });
     return tags.links.box.style('display', 'block');
@@ -375,6 +359,18 @@
     links.style('display', 'block');
   }
 
+  if ((typeof ffhome_places !== "undefined" && ffhome_places !== null) && ffhome_places.length) {
+    places = d3.select('#places');
+    places.select('ul').selectAll('li').data(ffhome_places).enter().append('li').append('a').attr('href', function(d) {
+      return d.url;
+    }).attr('title', function(d) {
+      return d.host + ": " + d.visits + " visit(s)";
+    }).text(function(d) {
+      return d.title || d.url;
+    });
+    places.style('display', 'block');
+  }
+
   if ((typeof ffhome_notes !== "undefined" && ffhome_notes !== null) && ffhome_notes) {
     notes = d3.select('#notes');
     notes.select('code').text(ffhome_notes);